@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for benchmarks that measure every configuration in a fresh worker process
+- The script re-runs itself with --worker <args>; the worker prints its result as one JSON line
+- Failures are reported with the last line of the worker's stderr
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_frame(image_path):
+    # Timing frame; a blank 640x480 frame if the image cannot be read
+    import cv2
+    frame = cv2.imread(str(image_path)) if image_path else None
+    if frame is None:
+        print(f"Could not read {image_path}, using a blank 640x480 frame", file=sys.stderr)
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    return frame
+
+
+def print_result(result):
+    # Worker side: the result is the last line of stdout
+    print(json.dumps(result))
+
+
+def run_worker(script, worker_args, extra_args=()):
+    # Run `script --worker <worker_args> <extra_args>` in a new process
+    # Returns (result, None), or (None, error message) if the worker failed
+    command = [sys.executable, str(script), "--worker", *map(str, worker_args), *map(str, extra_args)]
+    proc = subprocess.run(command, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        return None, error
+    return json.loads(proc.stdout.strip().splitlines()[-1]), None
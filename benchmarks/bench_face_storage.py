@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Face embedding storage precision benchmark
+- Builds a synthetic gallery of L2-normalized 512-d embeddings (clustered like real identities)
+- For float32 / float16 / int8 storage, reports gallery memory, memory saved and
+  the change of match scores and top-1 results against a float64 baseline
+Usage (from the project root):
+    python benchmarks/bench_face_storage.py --gallery 100000 --queries 1000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.face_recognition.face_store import encode_embeddings, decode_embeddings, STORAGE_DTYPES
+
+
+def make_gallery(count, dim, rng):
+    # Identities spread over a few hundred clusters, queries are noisy copies of gallery rows
+    centers = rng.normal(size=(max(1, count // 100), dim))
+    gallery = centers[rng.integers(0, centers.shape[0], count)] + rng.normal(size=(count, dim))
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+    return gallery
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gallery", type=int, default=100000, help="number of enrolled embeddings")
+    parser.add_argument("--queries", type=int, default=1000, help="number of probe embeddings")
+    parser.add_argument("--dim", type=int, default=512, help="embedding dimension")
+    parser.add_argument("--chunk", type=int, default=65536, help="rows decoded per scoring chunk")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    gallery = make_gallery(args.gallery, args.dim, rng)
+    rows = rng.integers(0, args.gallery, args.queries)
+    queries = gallery[rows] + 0.6 * rng.normal(size=(args.queries, args.dim)) / np.sqrt(args.dim)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    # float64 baseline
+    baseline = queries @ gallery.T
+    baseline_top1 = np.argmax(baseline, axis=1)
+    baseline_bytes = gallery.nbytes
+    queries32 = queries.astype(np.float32)
+
+    print(f"Gallery: {args.gallery} x {args.dim}, queries: {args.queries}")
+    print(f"{'dtype':<8} {'memory MB':>10} {'saved':>7} {'mean |dS|':>10} {'max |dS|':>10} "
+          f"{'top-1 agree':>12} {'search ms/q':>12}")
+    print(f"{'float64':<8} {baseline_bytes / 2**20:>10.1f} {'-':>7} {'-':>10} {'-':>10} {'-':>12} {'-':>12}")
+
+    for storage_dtype in STORAGE_DTYPES:
+        data, scales = encode_embeddings(gallery, storage_dtype)
+        memory = data.nbytes + (scales.nbytes if storage_dtype == "int8" else 0)
+
+        start_time = time.perf_counter()
+        scores = np.empty(baseline.shape, dtype=np.float32)
+        for start in range(0, args.gallery, args.chunk):
+            stop = min(start + args.chunk, args.gallery)
+            scores[:, start:stop] = queries32 @ decode_embeddings(data[start:stop], scales[start:stop]).T
+        elapsed = time.perf_counter() - start_time
+
+        diff = np.abs(scores - baseline)
+        agree = np.mean(np.argmax(scores, axis=1) == baseline_top1)
+        print(f"{storage_dtype:<8} {memory / 2**20:>10.1f} {1 - memory / baseline_bytes:>7.1%} "
+              f"{diff.mean():>10.2e} {diff.max():>10.2e} {agree:>12.2%} "
+              f"{elapsed * 1000 / args.queries:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Detector input size benchmark on recorded footage
+- Replays a video file or image directory and runs the face pipeline (detection + recognition
+  of the largest face) at fixed detector input sizes and with the adaptive size
+- Reports per-frame latency, detection rate and, against the largest fixed size, how often
+  the same face is found (box IoU >= 0.5)
+Usage (from the project root):
+    python benchmarks/det_size_benchmark.py footage.mp4
+    python benchmarks/det_size_benchmark.py frames_dir/ --sizes 256 320 480 640 --escalate-score 0.6
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.settings import CaptureParam, FacePipelineParam, FaceTrackingParam
+
+
+def read_frames(source, max_frames):
+    # Decode the footage once so every configuration sees the same frames
+    from src.face_recognition.frame_source import open_capture
+    CaptureParam.replay_realtime = False
+    cap = open_capture(source, CaptureParam())
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(pipeline, frames):
+    # Latency (ms) and largest face box (or None) per frame
+    pipeline.reset()
+    latencies, boxes = [], []
+    for frame in frames:
+        start_time = time.perf_counter()
+        faces = pipeline.get(frame)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        boxes.append(max(faces, key=lambda face: (face.bbox[2] - face.bbox[0]) * (face.bbox[3] - face.bbox[1])).bbox
+                     if faces else None)
+    return np.array(latencies), boxes
+
+
+def agreement(boxes, reference):
+    # Fraction of reference detections found again at (roughly) the same place
+    from src.face_recognition.liveness_scheduler import bbox_iou
+    pairs = [(box, ref) for box, ref in zip(boxes, reference) if ref is not None]
+    if not pairs:
+        return float("nan")
+    return float(np.mean([box is not None and bbox_iou(box, ref) >= 0.5 for box, ref in pairs]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="video file or image directory")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[320, 480, 640],
+                        help="square detector input sizes, smallest first (the adaptive mode escalates through them)")
+    parser.add_argument("--escalate-score", type=float, default=FacePipelineParam.escalate_score,
+                        help="detection score below which the adaptive mode tries the next size")
+    parser.add_argument("--max-frames", type=int, default=300, help="frames read from the source")
+    args = parser.parse_args()
+
+    from src.face_recognition.model_pool import create_face_analysis
+    from src.face_recognition.face_pipeline import FacePipeline
+
+    frames = read_frames(args.source, args.max_frames)
+    if not frames:
+        raise SystemExit(f"No frames read from {args.source}")
+    app = create_face_analysis()
+    sizes = [(size, size) for size in args.sizes]
+    tracking = FaceTrackingParam()
+    tracking.enabled = False
+
+    configs = [(f"fixed {size[0]}", [size]) for size in sizes]
+    configs.append(("adaptive", sizes))
+    results = {}
+    for name, det_sizes in configs:
+        param = FacePipelineParam()
+        param.adaptive_det_size = True
+        param.adaptive_det_sizes = det_sizes
+        # A single size never escalates
+        param.escalate_score = args.escalate_score if len(det_sizes) > 1 else 0.0
+        pipeline = FacePipeline(app, tracking_param=tracking, param=param)
+        run(pipeline, frames[:3])
+        latencies, boxes = run(pipeline, frames)
+        results[name] = (latencies, boxes, dict(pipeline.det_size_counts))
+
+    reference = results[configs[-2][0]][1]
+    print(f"{len(frames)} frames from {args.source}, reference: {configs[-2][0]}")
+    print(f"{'config':<12} {'mean ms':>8} {'p95 ms':>8} {'detected':>9} {'same face':>10}  detector sizes used")
+    for name, (latencies, boxes, counts) in results.items():
+        detected = np.mean([box is not None for box in boxes])
+        used = ", ".join(f"{size[0]}: {count}" for size, count in sorted(counts.items()))
+        print(f"{name:<12} {latencies.mean():>8.1f} {np.percentile(latencies, 95):>8.1f} {detected:>9.1%} "
+              f"{agreement(boxes, reference):>10.1%}  {used}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Liveness preprocessing benchmark
+- Compares AntiSpoofPredict.img_preprocess (slice + cv2.resize + to_tensor) with the fused
+  img_preprocess_into path (frame view resized and cast into reused buffers) on the same
+  frames and boxes, alone and as a batch of faces feeding one forward pass
+- Reports time per face, the pixel difference of the two inputs and of the liveness scores
+Usage (from the project root):
+    python benchmarks/liveness_preprocess_benchmark.py --runs 2000
+    python benchmarks/liveness_preprocess_benchmark.py --image frame.jpg
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+
+
+def make_boxes(width, height, count, rng):
+    # Face boxes of plausible sizes, some of them touching the frame border
+    sizes = rng.uniform(0.15, 0.5, count) * min(width, height)
+    xs = rng.uniform(-0.2, 1.0, count) * (width - sizes)
+    ys = rng.uniform(-0.2, 1.0, count) * (height - sizes)
+    return [[int(max(0, x)), int(max(0, y)), int(s), int(s * 1.2)] for x, y, s in zip(xs, ys, sizes)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=None, help="frame to crop from (default: synthetic 640x480)")
+    parser.add_argument("--boxes", type=int, default=64, help="number of distinct face boxes")
+    parser.add_argument("--batch", type=int, default=4, help="faces per frame for the batch timing")
+    parser.add_argument("--runs", type=int, default=1000, help="timed preprocessing calls per path")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.image:
+        frame = cv2.imread(args.image)
+        if frame is None:
+            raise SystemExit(f"Cannot read {args.image}")
+    else:
+        frame = cv2.GaussianBlur(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8), (7, 7), 2)
+    height, width = frame.shape[:2]
+    boxes = make_boxes(width, height, args.boxes, rng)
+
+    predictor = AntiSpoofPredict()
+    out = predictor._input_batch(1)[0].numpy()
+
+    # Same input either way, up to interpolation rounding
+    legacy = torch.cat([predictor.img_preprocess(frame, box) for box in boxes]).numpy()
+    fused = np.stack([predictor.img_preprocess_into(frame, box, out).copy() for box in boxes])
+    pixel_diff = np.abs(legacy - fused)
+    with torch.no_grad():
+        legacy_probs = torch.softmax(predictor.model(torch.from_numpy(legacy)), dim=1).numpy()
+        fused_probs = torch.softmax(predictor.model(torch.from_numpy(fused)), dim=1).numpy()
+
+    timings = {}
+    for name, call in (("legacy", lambda box: predictor.img_preprocess(frame, box)),
+                       ("fused", lambda box: predictor.img_preprocess_into(frame, box, out))):
+        for box in boxes[:10]:
+            call(box)
+        start_time = time.perf_counter()
+        for i in range(args.runs):
+            call(boxes[i % len(boxes)])
+        timings[name] = (time.perf_counter() - start_time) * 1e6 / args.runs
+
+    # A frame's worth of faces, as predict_batch builds its input either way
+    batch = boxes[:args.batch]
+    for name, call in (("legacy batch", lambda: torch.cat([predictor.img_preprocess(frame, box) for box in batch])),
+                       ("fused batch", lambda: [predictor.img_preprocess_into(frame, box, out_row) for box, out_row
+                                                in zip(batch, predictor._input_batch(len(batch)).numpy())])):
+        call()
+        start_time = time.perf_counter()
+        for _ in range(max(1, args.runs // len(batch))):
+            call()
+        timings[name] = (time.perf_counter() - start_time) * 1e6 / max(1, args.runs // len(batch))
+
+    print(f"Frame {width}x{height}, {len(boxes)} boxes, {args.runs} runs")
+    print(f"legacy img_preprocess:     {timings['legacy']:.1f} us/face")
+    print(f"fused img_preprocess_into: {timings['fused']:.1f} us/face ({timings['legacy'] / timings['fused']:.2f}x)")
+    print(f"legacy, {len(batch)} faces:          {timings['legacy batch']:.1f} us/frame")
+    print(f"fused, {len(batch)} faces:           {timings['fused batch']:.1f} us/frame "
+          f"({timings['legacy batch'] / timings['fused batch']:.2f}x)")
+    print(f"Input |diff| max / mean:  {pixel_diff.max():.0f} / {pixel_diff.mean():.3f} (0-255 scale)")
+    print(f"Liveness |dP| max:        {np.abs(legacy_probs - fused_probs).max():.4f}, "
+          f"label agreement {np.mean(legacy_probs.argmax(1) == fused_probs.argmax(1)):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+insightface model pack report
+- For every model pack / module configuration, loads FaceAnalysis in a fresh process and
+  measures resident memory (RSS) growth, load time and per-frame latency of app.get()
+- Use a real face image for meaningful recognition timings (no face -> detection only)
+Usage (from the project root):
+    python benchmarks/model_pack_report.py --image data/face_samples/image_F1.jpg --frames 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks._worker import load_frame, print_result, run_worker
+from config.paths import SAMPLE_IMAGES_DIR
+
+MODEL_PACKS = ["buffalo_l", "buffalo_s", "buffalo_sc"]
+MODULE_SETS = {
+    "det+rec": ["detection", "recognition"],
+    "all": None,
+}
+
+
+def rss_bytes():
+    # Current resident set size; psutil if available, otherwise peak RSS from the OS
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def worker(model_pack, modules, image_path, frames):
+    # Measure one configuration; runs in its own process so RSS numbers do not mix
+    from config.settings import FaceModelParam
+    from src.face_recognition.model_pool import create_face_analysis
+
+    frame = load_frame(image_path)
+    base_rss = rss_bytes()
+
+    param = FaceModelParam()
+    param.model_pack = model_pack
+    param.allowed_modules = modules
+    start_time = time.perf_counter()
+    app = create_face_analysis(param)
+    load_time = time.perf_counter() - start_time
+
+    # First call pays lazy initialisation, keep it out of the steady-state numbers
+    faces = app.get(frame)
+    latencies = []
+    for _ in range(frames):
+        start_time = time.perf_counter()
+        app.get(frame)
+        latencies.append(time.perf_counter() - start_time)
+
+    return {
+        "models": sorted(app.models.keys()),
+        "faces": len(faces),
+        "rss_mb": (rss_bytes() - base_rss) / 2**20,
+        "load_s": load_time,
+        "mean_ms": 1000 * float(np.mean(latencies)),
+        "p95_ms": 1000 * float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=str(SAMPLE_IMAGES_DIR), help="frame used for timing")
+    parser.add_argument("--frames", type=int, default=30, help="timed frames per configuration")
+    parser.add_argument("--packs", nargs="*", default=MODEL_PACKS, help="model packs to measure")
+    parser.add_argument("--worker", nargs=2, metavar=("PACK", "MODULES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        pack, module_set = args.worker
+        print_result(worker(pack, MODULE_SETS[module_set], args.image, args.frames))
+        return
+
+    print(f"{'pack':<11} {'modules':<8} {'RSS MB':>8} {'load s':>7} {'mean ms':>8} {'p95 ms':>8} {'faces':>5}  loaded models")
+    for pack in args.packs:
+        for module_set in MODULE_SETS:
+            result, error = run_worker(__file__, [pack, module_set],
+                                       ["--image", args.image, "--frames", args.frames])
+            if error:
+                print(f"{pack:<11} {module_set:<8} failed: {error}")
+                continue
+            print(f"{pack:<11} {module_set:<8} {result['rss_mb']:>8.0f} {result['load_s']:>7.2f} "
+                  f"{result['mean_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['faces']:>5}  "
+                  f"{','.join(result['models'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end face pipeline benchmark on recorded footage (no camera, no display needed)
+- Replays a video file or image directory through FaceDetector.run / FaceRecorder.run in
+  headless mode and reports frames per second, per-stage timings and time-to-decision
+Usage (from the project root):
+    python benchmarks/replay_benchmark.py footage.mp4 --username alice
+    python benchmarks/replay_benchmark.py frames_dir/ --identify --fast
+    python benchmarks/replay_benchmark.py frames_dir/ --enroll bench_user --fast
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.settings import CaptureParam
+
+
+def summarize(result):
+    frames = result["frames"]
+    print(f"\nstatus: {result['status']}  ok: {result['ok']}")
+    if "identity" in result:
+        print(f"identity: {result['identity']}")
+    print(f"frames: {len(frames)}  total: {result['total_time']:.2f}s  fps: {result['fps']:.1f}")
+    if "liveness_inferences" in result:
+        print(f"liveness model runs: {result['liveness_inferences']} "
+              f"({sum(1 for frame in frames if frame['faces'])} frames with a face)")
+    decision = result["time_to_decision"]
+    print(f"time to decision: {'-' if decision is None else f'{decision:.2f}s'}")
+
+    stages = sorted({key for frame in frames for key in frame if key.endswith("_ms")})
+    print(f"{'stage':<14} {'frames':>7} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for stage in stages:
+        values = np.array([frame[stage] for frame in frames if stage in frame])
+        print(f"{stage[:-3]:<14} {len(values):>7} {values.mean():>8.2f} "
+              f"{np.percentile(values, 50):>8.2f} {np.percentile(values, 95):>8.2f}")
+    scores = [frame["score"] for frame in frames if "score" in frame]
+    if scores:
+        print(f"match scores: mean {np.mean(scores):.3f}, max {np.max(scores):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="video file or image directory")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--username", help="verify this claimed user (FaceDetector.run)")
+    mode.add_argument("--identify", action="store_true", help="1:N identification (FaceDetector.run)")
+    mode.add_argument("--enroll", metavar="NAME", help="enroll under this name (FaceRecorder.run)")
+    parser.add_argument("--fast", action="store_true", help="replay as fast as possible instead of real time")
+    args = parser.parse_args()
+
+    CaptureParam.replay_realtime = not args.fast
+
+    if args.enroll:
+        from src.face_recognition.face_recorder import FaceRecorder
+        recorder = FaceRecorder()
+        recorder.run(args.enroll, source=args.source, headless=True)
+        result = recorder.last_result
+    else:
+        from src.face_recognition.face_detector import FaceDetector
+        detector = FaceDetector()
+        detector.run(args.username, source=args.source, headless=True)
+        result = detector.last_result
+    summarize(result)
+
+
+if __name__ == "__main__":
+    main()
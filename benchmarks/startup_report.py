@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Startup-time report
+- Imports the given modules in a fresh interpreter with `python -X importtime`
+- Prints the cumulative import cost of each module down to --depth levels of nesting
+  (depth 0 = the imported module itself), most expensive first
+Default: the login window module (what the user waits for) and the face pipeline
+modules (what the background warm-up loads).
+Usage (from the project root):
+    python benchmarks/startup_report.py
+    python benchmarks/startup_report.py src.login_system --depth 3 --top 30
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = [
+    "src.login_system",
+    "src.face_recognition.face_detector",
+    "src.face_recognition.face_recorder",
+]
+
+
+def import_times(module, max_depth):
+    # Return (wall seconds, [(cumulative us, self us, depth, name)]) for one module
+    start_time = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=PROJECT_ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start_time
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        raise RuntimeError(last_line)
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        # Nested imports are indented by two spaces per level below their parent
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth > max_depth:
+            continue
+        entries.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return wall, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="modules to import")
+    parser.add_argument("--depth", type=int, default=2, help="nesting levels to report")
+    parser.add_argument("--top", type=int, default=20, help="number of modules listed per report")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        try:
+            wall, entries = import_times(module, args.depth)
+        except RuntimeError as e:
+            print(f"\n{module}: import failed ({e})")
+            continue
+        print(f"\n{module}: {wall * 1000:.0f} ms wall (interpreter start included)")
+        print(f"  {'cumulative ms':>13}  {'self ms':>8}  module")
+        for cumulative_us, self_us, depth, name in sorted(entries, reverse=True)[:args.top]:
+            print(f"  {cumulative_us / 1000:>13.1f}  {self_us / 1000:>8.1f}  {'  ' * depth}{name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+CPU thread budget sweep
+- For every split of onnxruntime / torch / OpenCV threads, runs the per-frame face pipeline
+  (FaceAnalysis.get + liveness on the largest face) in a fresh process and reports
+  mean / p95 frame latency; the best split is printed as ThreadBudgetParam settings
+- With --source, frames come from a replayed video / image directory through the threaded
+  capture, so frame decoding competes for the cores like on the kiosk
+Usage (from the project root):
+    python benchmarks/thread_budget_sweep.py --image data/face_samples/image_F1.jpg
+    python benchmarks/thread_budget_sweep.py --source footage.mp4 --threads 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks._worker import load_frame, print_result, run_worker
+from config.paths import SAMPLE_IMAGES_DIR
+
+
+def default_thread_counts():
+    # 1, 2, 4, ... up to the number of cores (always including the core count itself)
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def worker(ort_threads, torch_threads, opencv_threads, image_path, source, frames):
+    # Measure one split; runs in its own process because thread pools cannot be resized reliably
+    from config.settings import ThreadBudgetParam, CaptureParam
+    from src.face_recognition.model_pool import create_face_analysis, warm_up_face_analysis
+    from src.face_recognition.thread_budget import apply_torch_threads
+    from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+    from src.face_recognition.face_pipeline import largest_face
+
+    param = ThreadBudgetParam()
+    param.total_threads = max(ort_threads, torch_threads, opencv_threads)
+    param.onnxruntime_threads = ort_threads
+    param.torch_threads = torch_threads
+    param.opencv_threads = opencv_threads
+
+    app = create_face_analysis(thread_param=param)
+    apply_torch_threads(param)
+    liveness_model = AntiSpoofPredict()
+    warm_up_face_analysis(app)
+
+    cap = None
+    if source:
+        from src.face_recognition.frame_source import open_capture
+        CaptureParam.replay_realtime = False
+        cap = open_capture(source)
+    else:
+        frame = load_frame(image_path)
+
+    latencies = []
+    faces_seen = 0
+    for _ in range(frames + 1):
+        if cap is not None:
+            ret, frame = cap.read()
+            if not ret:
+                break
+        start_time = time.perf_counter()
+        faces = app.get(frame)
+        if faces:
+            faces_seen += 1
+            liveness_model.predict(frame, largest_face(faces).bbox.astype(int))
+        latencies.append(time.perf_counter() - start_time)
+    if cap is not None:
+        cap.release()
+
+    # The first frame pays lazy initialisation
+    latencies = latencies[1:] or latencies
+    return {
+        "frames": len(latencies),
+        "faces": faces_seen,
+        "mean_ms": 1000 * float(np.mean(latencies)),
+        "p95_ms": 1000 * float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=str(SAMPLE_IMAGES_DIR), help="frame used for timing")
+    parser.add_argument("--source", default=None, help="video file or image directory to replay instead")
+    parser.add_argument("--frames", type=int, default=50, help="timed frames per split")
+    parser.add_argument("--threads", type=int, nargs="*", default=default_thread_counts(),
+                        help="thread counts tried for onnxruntime and torch")
+    parser.add_argument("--opencv-threads", type=int, nargs="*", default=[1],
+                        help="thread counts tried for OpenCV")
+    parser.add_argument("--worker", type=int, nargs=3, metavar=("ORT", "TORCH", "OPENCV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print_result(worker(*args.worker, args.image, args.source, args.frames))
+        return
+
+    print(f"{os.cpu_count()} cores, {args.frames} frames per split")
+    print(f"{'onnxruntime':>11} {'torch':>6} {'opencv':>7} {'mean ms':>8} {'p95 ms':>8} {'faces':>6}")
+    results = []
+    for ort_threads in args.threads:
+        for torch_threads in args.threads:
+            for opencv_threads in args.opencv_threads:
+                extra_args = ["--image", args.image, "--frames", args.frames]
+                if args.source:
+                    extra_args += ["--source", args.source]
+                result, error = run_worker(__file__, [ort_threads, torch_threads, opencv_threads], extra_args)
+                if error:
+                    print(f"{ort_threads:>11} {torch_threads:>6} {opencv_threads:>7} failed: {error}")
+                    continue
+                results.append(((ort_threads, torch_threads, opencv_threads), result))
+                print(f"{ort_threads:>11} {torch_threads:>6} {opencv_threads:>7} {result['mean_ms']:>8.1f} "
+                      f"{result['p95_ms']:>8.1f} {result['faces']:>6}")
+
+    if results:
+        # Rank by tail latency first: spikes are what the kiosk users notice
+        (ort_threads, torch_threads, opencv_threads), result = min(
+            results, key=lambda item: (item[1]["p95_ms"], item[1]["mean_ms"]))
+        print(f"\nBest split (p95 {result['p95_ms']:.1f} ms, mean {result['mean_ms']:.1f} ms):")
+        print(f"    total_threads = {max(ort_threads, torch_threads, opencv_threads)}")
+        print(f"    onnxruntime_threads = {ort_threads}")
+        print(f"    torch_threads = {torch_threads}")
+        print(f"    opencv_threads = {opencv_threads}")
+
+
+if __name__ == "__main__":
+    main()
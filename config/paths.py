@@ -5,6 +5,8 @@ ROOT_DIR = Path(__file__).parent.parent
 
 # Liveness detection model path
 LIVENESS_MODEL_PATH = ROOT_DIR / "model" / "anti_spoof_model" / "2.7_80x80_MiniFASNetV2.pth"
+# Liveness models loaded together in ensemble mode (every <scale>_<h>x<w>_<type>.pth file)
+LIVENESS_MODEL_DIR = ROOT_DIR / "model" / "anti_spoof_model"
 
 # users data path
 USER_DATA_FILE = ROOT_DIR / "data" / "users_data.json"
@@ -12,6 +14,12 @@ USER_DATA_FILE = ROOT_DIR / "data" / "users_data.json"
 # Data-related paths
 FACE_SAMPLE_DIR = ROOT_DIR / "data" / "face_samples"
 FACE_DATA_FILE = ROOT_DIR / "data" / "face_data.json"
+# Binary, memory-mapped face store (replaces face_data.json, which is migrated on first load)
+FACE_STORE_FILE = ROOT_DIR / "data" / "face_data.bin"
+# IVF index (centroids and row assignments) for the face store
+FACE_INDEX_FILE = ROOT_DIR / "data" / "face_index.npz"
+# Append-only log of face enrollments/deletions since the last face store snapshot
+FACE_LOG_FILE = ROOT_DIR / "data" / "face_data.log"
 
 # Config-related paths
 CONFIG_DIR = ROOT_DIR / "config"
@@ -27,4 +35,3 @@ SAMPLE_IMAGES_DIR = ROOT_DIR / "data" / "face_samples" / "image_F1.jpg"
 
 # Fingerprint sample directory
 FINGERPRINT_DIR = ROOT_DIR / "data" / "fingerprints"
-FINGERPRINT_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
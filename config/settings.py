@@ -1,17 +1,72 @@
+# insightface FaceAnalysis configuration
+class FaceModelParam:
+    # Model pack: "buffalo_l", "buffalo_s" or "buffalo_sc"
+    model_pack = "buffalo_l"
+    # Only these insightface modules are loaded; the landmark and gender/age models are unused
+    # (None loads every model of the pack)
+    allowed_modules = ["detection", "recognition"]
+    # -1 runs on CPU, >= 0 selects a GPU
+    ctx_id = -1
+    # Detector input size
+    det_size = (640, 640)
+
 # Face matching threshold
 FACE_MATCHING_THRESHOLD = 0.5
 REGISTER_FACE_MATCHING_THRESHOLD = 0.5
 
+# Face matching mode for login
+# "verify": 1:1 match against the claimed username only (cost does not depend on gallery size)
+# "identify": 1:N search over the whole face database
+FACE_MATCHING_MODE = "verify"
+# Number of random impostor templates the claimed user must beat in verify mode (0 = disabled)
+FACE_VERIFY_COHORT_SIZE = 0
+
+# Storage precision of enrolled face embeddings: "float32", "float16" or "int8" (per-vector scaled)
+# Embeddings are always L2-normalized and scored in float32
+FACE_STORAGE_DTYPE = "float32"
+# Number of face log records after which the log is compacted into a new face store snapshot
+FACE_LOG_COMPACT_RECORDS = 1000
+
 # Registration status
 REGISTER_FAIL = 0
 REGISTER_SUCCESS = 1
 REGISTER_DUPLICATE = 2
 
-# Liveness detection model image size
+# Liveness detection model loading
+# (crop scale and input size come from the model file name, e.g. 2.7_80x80_MiniFASNetV2.pth)
 class LivenessModelParam:
-    scale = 2.7
-    out_width = 80
-    out_height = 80
+    # Fold BatchNorm layers into the convolutions when loading the .pth model
+    fuse_bn = True
+    # Load the TorchScript export (model_export.py) next to the .pth when it is up to date
+    prefer_torchscript = True
+    # Load the int8 model from model_quantize.py (<name>_int8.ts) instead of the fp32 one
+    quantized = False
+    # Quantized kernel backend, must match the one used for quantization
+    quantized_engine = "x86"
+    # Crop + resize + tensor conversion into reused buffers, without per-frame allocations
+    fused_preprocess = True
+    # Run every model in LIVENESS_MODEL_DIR (different crop scales / architectures) and average
+    # their softmax outputs instead of using LIVENESS_MODEL_PATH alone
+    ensemble = False
+    # Threads running the ensemble models concurrently (0 = one per model)
+    ensemble_workers = 0
+
+# Liveness scheduling for the camera loops
+class LivenessScheduleParam:
+    # Reuse recent liveness results of a steady face instead of running the model on every frame
+    enabled = True
+    # Run the liveness model at least every N frames per tracked face
+    inference_interval = 5
+    # Number of liveness results averaged per tracked face
+    window = 5
+    # Re-run when the box overlaps the box of the last inference less than this (IoU)
+    bbox_iou_threshold = 0.7
+    # Re-run when the face thumbnail changed more than this (mean absolute difference, 0-255)
+    appearance_threshold = 12.0
+    # A box continues a track when it overlaps the track's last box at least this much (IoU)
+    track_iou_threshold = 0.3
+    # Forget a track after it has not been seen for this many frames
+    max_missed_frames = 5
 
 # Face registration related parameters
 class RegistionParam:
@@ -22,4 +77,87 @@ class RegistionParam:
     # Minimum time interval between valid frames (seconds)
     frame_interval = 0.5
     # Maximum duration of detection (seconds)
-    detection_time_limit = 10
\ No newline at end of file
+    detection_time_limit = 10
+
+# Approximate nearest-neighbour (IVF) index for large face galleries
+class FaceIndexParam:
+    # Use the IVF index at all (False -> always exact search)
+    enabled = False
+    # Galleries smaller than this are always searched exactly
+    exact_search_limit = 20000
+    # Number of coarse clusters; 0 -> 4 * sqrt(gallery size)
+    n_lists = 0
+    # Clusters probed per query: the recall/latency knob
+    n_probe = 16
+    # k-means training parameters
+    train_iterations = 10
+    train_sample = 100000
+    # Retrain when the gallery has grown by this factor since the last training
+    retrain_growth = 4
+
+# Shared model pool (FaceAnalysis, liveness model, face database)
+class ModelPoolParam:
+    # Run one inference on a dummy frame right after loading to remove first-call latency
+    warm_up = True
+    # Release models that have not been used for this many seconds (0 = keep forever)
+    idle_timeout = 600
+    # Load the models on a background thread as soon as the login window is shown
+    preload_on_startup = True
+
+# CPU threads used by the inference libraries
+# (onnxruntime for insightface, torch for liveness, OpenCV for image preprocessing)
+class ThreadBudgetParam:
+    # Total thread budget; 0 leaves every library at its own default
+    total_threads = 0
+    # Per-library threads, None -> derived from total_threads (see thread_budget.thread_split);
+    # benchmarks/thread_budget_sweep.py finds the best split for a machine
+    onnxruntime_threads = None
+    torch_threads = None
+    opencv_threads = None
+
+# Per-frame face analysis in the camera loops
+class FacePipelineParam:
+    # Run the recognition model only on the largest detected face (the one the loops use);
+    # the other faces are returned with detection results only
+    largest_face_only = True
+    # Adaptive detector input size: full-frame detection starts at the first size and only moves
+    # to the next one when no face is found or the best detection score is below escalate_score
+    adaptive_det_size = False
+    adaptive_det_sizes = [(320, 320), (480, 480), (640, 640)]
+    escalate_score = 0.7
+
+# Detect-then-track mode for the camera loops
+class FaceTrackingParam:
+    # Track the face between full-frame detections
+    enabled = False
+    # Run the full-frame detector at least every N frames
+    full_detect_interval = 10
+    # Between full detections, detect only inside the previous box enlarged by this factor
+    roi_scale = 2.0
+    # Detector input size used for the region of interest (multiple of 32)
+    roi_det_size = (224, 224)
+
+# Camera capture
+class CaptureParam:
+    # Frame source: None -> camera_index, or a video file / image directory to replay
+    source = None
+    camera_index = 0
+    frame_width = 640
+    frame_height = 480
+    # Read frames on a producer thread so the loops always get fresh frames
+    threaded = True
+    # Frames kept for the consumer (1 = newest frame only, older ones are dropped)
+    buffer_size = 1
+    # Seconds to wait for a new frame before reporting a read failure
+    read_timeout = 2.0
+    # Replay video files / image directories at recorded speed (False = as fast as possible)
+    replay_realtime = True
+    # Frame rate used to replay an image directory
+    replay_fps = 30
+
+# Camera window
+class DisplayParam:
+    # No window and no overlay drawing (run details are kept in last_result either way)
+    headless = False
+    # Show the camera image mirrored (display only, frames are processed unflipped)
+    mirror = True
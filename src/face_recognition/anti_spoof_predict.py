@@ -7,6 +7,7 @@
 
 import os
 
+import cv2
 import numpy as np
 import torch
 import torch.nn.functional as F
@@ -23,17 +24,67 @@ MODEL_MAPPING = {
 }
 
 class AntiSpoofPredict:
-    def __init__(self):
+    def __init__(self, model_path=None, fuse=None, use_torchscript=None, quantized=None):
         self.device = torch.device("cpu")
+        param = LivenessModelParam()
+        self.param = param
+        self.image_cropper = CropImage()
+        model_path = str(model_path or LIVENESS_MODEL_PATH)
+        fuse = param.fuse_bn if fuse is None else fuse
+        use_torchscript = param.prefer_torchscript if use_torchscript is None else use_torchscript
+        quantized = param.quantized if quantized is None else quantized
+
+        # Crop scale and input size come from the model file name (2.7_80x80_MiniFASNetV2.pth),
+        # "org_..." models see the whole frame
+        self.out_height, self.out_width, _, self.scale = parse_model_name(os.path.basename(model_path))
+
+        # Load model: the int8 model if configured, else the exported TorchScript artifact,
+        # else the .pth itself. Artifacts older than the .pth are stale and skipped
+        int8_path = os.path.splitext(model_path)[0] + "_int8.ts"
+        script_path = os.path.splitext(model_path)[0] + ".ts"
+        if quantized and not os.path.exists(int8_path):
+            print(f"Int8 liveness model not found, using fp32: {int8_path}")
+        elif quantized and not self._is_current(int8_path, model_path):
+            print(f"Int8 liveness model is older than {model_path}, using fp32: {int8_path}")
+        if quantized and self._is_current(int8_path, model_path):
+            torch.backends.quantized.engine = param.quantized_engine
+            self._load_script(model_path, int8_path)
+        elif use_torchscript and self._is_current(script_path, model_path):
+            self._load_script(model_path, script_path)
+        else:
+            self._load_model(model_path)
+            self.model.eval()
+            if fuse:
+                from src.face_recognition.model_export import fuse_bn
+                fuse_bn(self.model)
+            self.num_classes = self.model.prob.out_features
+
+        # Reused by the fused preprocessing path: one crop and an (N, 3, H, W) input batch
+        self._crop = np.empty((self.out_height, self.out_width, 3), dtype=np.uint8)
+        self._crop_float = np.empty((self.out_height, self.out_width, 3), dtype=np.float32)
+        self._inputs = np.empty((0, 3, self.out_height, self.out_width), dtype=np.float32)
+        self._inputs_tensor = torch.from_numpy(self._inputs)
+
+    @staticmethod
+    def _is_current(artifact_path, model_path):
+        # An exported artifact is only used if it is not older than the .pth it came from
+        return os.path.exists(artifact_path) and \
+            os.path.getmtime(artifact_path) >= os.path.getmtime(model_path)
 
-        # Load model
-        self._load_model(LIVENESS_MODEL_PATH)
+    def _load_script(self, model_path, script_path):
+        # TorchScript export of the same model; the input size still comes from the .pth name
+        h_input, w_input, _, _ = parse_model_name(os.path.basename(model_path))
+        self.input_size = (h_input, w_input)
+        self.model = torch.jit.load(script_path, map_location=self.device)
         self.model.eval()
+        with torch.no_grad():
+            self.num_classes = self.model(torch.zeros(1, 3, h_input, w_input)).shape[1]
 
     def _load_model(self, model_path):
         # Define model
         model_name = os.path.basename(model_path)
         h_input, w_input, model_type, _ = parse_model_name(model_name)
+        self.input_size = (h_input, w_input)
         self.kernel_size = get_kernel(h_input, w_input)
         self.model = MODEL_MAPPING[model_type](conv6_kernel=self.kernel_size).to(self.device)
 
@@ -54,28 +105,61 @@ class AntiSpoofPredict:
 
     def img_preprocess(self, img, bbox):
         # Image preprocessing
-        image_cropper = CropImage()
-        param = LivenessModelParam()
-
         # Crop image to the size required by the model
-        img = image_cropper.crop(img, bbox, param.scale, param.out_width, param.out_height, True)
+        img = self.image_cropper.crop(img, bbox, self.scale, self.out_width, self.out_height, self.scale is not None)
 
         # Convert to Tensor
         dst_img = to_tensor(img)
         dst_img = dst_img.unsqueeze(0).to(self.device)
         return dst_img
 
-    def predict(self, img, face_bbox):
-        # Image preprocessing
-        input_img = self.img_preprocess(img, face_bbox)
+    def _input_batch(self, count):
+        # (count, 3, H, W) float32 view of the reused input buffer, grown when needed
+        if self._inputs.shape[0] < count:
+            self._inputs = np.empty((count,) + self._inputs.shape[1:], dtype=np.float32)
+            self._inputs_tensor = torch.from_numpy(self._inputs)
+        return self._inputs_tensor[:count]
+
+    def img_preprocess_into(self, img, bbox, out):
+        # Allocation-free preprocessing into out (a (3, H, W) float32 array): the crop is a view
+        # of the frame, resized into a reused uint8 buffer and cast straight into out
+        if self.scale is None:
+            cv2.resize(img, (self.out_width, self.out_height), dst=self._crop)
+        else:
+            src_h, src_w = img.shape[:2]
+            left, top, right, bottom = CropImage._get_new_box(src_w, src_h, bbox, self.scale)
+            cv2.resize(img[top: bottom + 1, left: right + 1], (self.out_width, self.out_height), dst=self._crop)
+
+        # HWC uint8 -> CHW float32, one pass through the reused HWC float buffer
+        np.copyto(self._crop_float, self._crop, casting="unsafe")
+        np.copyto(out, self._crop_float.transpose(2, 0, 1))
+        return out
+
+    def predict_batch(self, frames_and_bboxes):
+        # Liveness probabilities of several faces in one forward pass
+        # frames_and_bboxes: iterable of (frame, bbox); faces of the same frame repeat the frame
+        # Returns an (N, num_classes) array of softmax probabilities, column 1 is "real"
+        frames_and_bboxes = list(frames_and_bboxes)
+        if not frames_and_bboxes:
+            return np.empty((0, self.num_classes), dtype=np.float32)
+
+        if self.param.fused_preprocess:
+            inputs = self._input_batch(len(frames_and_bboxes))
+            for out, (img, bbox) in zip(inputs.numpy(), frames_and_bboxes):
+                self.img_preprocess_into(img, bbox, out)
+        else:
+            inputs = torch.cat([self.img_preprocess(img, bbox) for img, bbox in frames_and_bboxes], dim=0)
 
-        # Prediction result
         with torch.no_grad():
-            result = self.model.forward(input_img)
-            result = F.softmax(result).cpu().numpy()
+            result = self.model.forward(inputs)
+            return F.softmax(result, dim=1).cpu().numpy()
+
+    def predict(self, img, face_bbox):
+        # Prediction result
+        result = self.predict_batch([(img, face_bbox)])
 
-        label = np.argmax(result)
+        label = np.argmax(result[0])
         if label == 1:
             return True
         else:
-            return False
\ No newline at end of file
+            return False
@@ -1,57 +1,338 @@
 import os
 import json
+import time
+from collections.abc import MutableMapping
 import numpy as np
-from config.paths import FACE_SAMPLE_DIR, FACE_DATA_FILE
-from config.settings import FACE_MATCHING_THRESHOLD
+from config.paths import FACE_SAMPLE_DIR, FACE_DATA_FILE, FACE_STORE_FILE, FACE_INDEX_FILE, FACE_LOG_FILE
+from config.settings import FACE_MATCHING_THRESHOLD, FACE_STORAGE_DTYPE, FACE_LOG_COMPACT_RECORDS, FaceIndexParam
+from src.face_recognition.face_store import (read_face_store, write_face_store, encode_embeddings,
+                                             decode_embeddings, STORAGE_DTYPES, FaceLog, LOG_OP_ENROLL)
+from src.face_recognition.ivf_index import IVFIndex
+
+
+class FaceDataView(MutableMapping):
+    # Dict-like name -> embedding view over the FaceDatabase search matrix
+    def __init__(self, database):
+        self.database = database
+
+    def __getitem__(self, name):
+        return self.database.decode_rows([self.database.name_index[name]])[0]
+
+    def __setitem__(self, name, embedding):
+        self.database.add_face(name, embedding)
+
+    def __delitem__(self, name):
+        if name not in self.database.name_index:
+            raise KeyError(name)
+        self.database._remove_row(name)
+
+    def __contains__(self, name):
+        return name in self.database.name_index
+
+    def __iter__(self):
+        return iter(list(self.database.names))
+
+    def __len__(self):
+        return len(self.database.names)
+
 
 class FaceDatabase:
     def __init__(self):
-        # Dictionary to store face feature vectors
-        self.face_data = {}
+        # Contiguous embedding matrix in the storage dtype (grown by doubling), its per-row
+        # float32 scales and the parallel name list; row i of the matrix belongs to self.names[i]
+        # and self.name_index maps name -> row
+        self.storage_dtype = FACE_STORAGE_DTYPE
+        self._matrix = None
+        self._scales = None
+        self.names = []
+        self.name_index = {}
+
+        # Dictionary-style access to face feature vectors
+        self.face_data = FaceDataView(self)
+
+        # Optional approximate nearest-neighbour index, built once the gallery is large enough
+        self.index_param = FaceIndexParam()
+        self.index = None
+        self.index_trained_size = 0
 
         # Create folder for saving face data
         self.save_dir = FACE_SAMPLE_DIR
         self.face_data_file = FACE_DATA_FILE
+        self.face_store_file = FACE_STORE_FILE
+        self.face_index_file = FACE_INDEX_FILE
+        # Enrollments and deletions are appended here and folded into the store on compaction
+        self.face_log = FaceLog(FACE_LOG_FILE)
 
         # Load existing face data
         self.load_faces()
 
     def load_faces(self):
         # Load registered face data from file
-        if not os.path.exists(self.face_data_file):
-            with open(self.face_data_file, 'w', encoding='utf-8') as f:
-                json.dump({}, f)
+        # No snapshot may be written before the log is replayed: save_faces empties the log
+        snapshot = False
+        migrated = False
+        if os.path.exists(self.face_store_file):
+            names, data, scales, storage_dtype = read_face_store(self.face_store_file)
+            if storage_dtype == self.storage_dtype or not names:
+                self.set_matrix(names, data, scales)
+                self.load_index()
+            else:
+                # The configured storage precision changed, convert the stored rows once
+                print(f"Converting face data from {storage_dtype} to {self.storage_dtype}")
+                self.set_embeddings(names, decode_embeddings(data, scales))
+                snapshot = True
+            # Only the database may keep the mapped arrays: save_faces detaches those before
+            # replacing the file, which Windows refuses while any mapping is open
+            del data, scales
+            print(f"Loaded {len(self.names)} face data entries")
+        elif os.path.exists(self.face_data_file):
+            self.migrate_json()
+            snapshot = migrated = True
+        else:
+            self.set_matrix([], None, None)
+
+        # Apply the changes made since the last snapshot
+        records = self.face_log.replay()
+        for op, name, embedding in records:
+            if op == LOG_OP_ENROLL:
+                self.add_face(name, embedding)
+            elif name in self.name_index:
+                self._remove_row(name)
+        if records:
+            print(f"Replayed {len(records)} face log records, {len(self.names)} face data entries")
+
+        # A (re)trained index is saved together with a snapshot, which also folds the log in
+        if not self.update_index():
+            if snapshot:
+                self.save_faces()
+            else:
+                self.compact_if_needed()
+        if migrated:
+            # Keep the old file as a backup so it is not migrated again
+            os.replace(self.face_data_file, str(self.face_data_file) + ".migrated")
+            print(f"Migrated face data from {self.face_data_file}")
+
+    def migrate_json(self):
+        # One-shot migration from the old face_data.json (load_faces then writes the binary store)
+        with open(self.face_data_file, 'r') as f:
+            data = json.load(f)
+        names = list(data.keys())
+        matrix = np.array([data[name] for name in names], dtype=np.float32) if names else None
+        self.set_embeddings(names, matrix)
+
+    def set_embeddings(self, names, matrix):
+        # Replace the whole database with the given names and (N, D) float embeddings
+        if len(names):
+            self.set_matrix(names, *encode_embeddings(matrix, self.storage_dtype))
         else:
-            with open(self.face_data_file, 'r') as f:
-                data = json.load(f)
-                # Convert list data back to numpy array
-                for name, embedding_list in data.items():
-                    self.face_data[name] = np.array(embedding_list)
-            print(f"Loaded {len(self.face_data)} face data entries")
+            self.set_matrix([], None, None)
+
+    def set_matrix(self, names, data, scales):
+        # Replace the whole database with already encoded rows and their scales
+        self.names = list(names)
+        self.name_index = {name: i for i, name in enumerate(self.names)}
+        self._matrix = data if self.names else None
+        self._scales = scales if self.names else None
+        self.index = None
+        self.index_trained_size = 0
+
+    def load_index(self):
+        # Load the saved IVF index if it matches the loaded face store
+        if not self.index_param.enabled or not os.path.exists(self.face_index_file):
+            return
+        index = self.new_index()
+        if index.load(self.face_index_file, len(self.names), self._matrix.shape[1]):
+            self.index = index
+            self.index_trained_size = len(self.names)
+        else:
+            print("Face index does not match the face data, it will be rebuilt")
+
+    def new_index(self):
+        param = self.index_param
+        n_lists = param.n_lists or int(4 * np.sqrt(len(self.names)))
+        return IVFIndex(n_lists, n_probe=param.n_probe, train_iterations=param.train_iterations,
+                        train_sample=param.train_sample)
+
+    def build_index(self):
+        # Train the IVF index on the current gallery
+        start_time = time.time()
+        self.index = self.new_index()
+        self.index.train(self.decode_rows, len(self.names))
+        self.index_trained_size = len(self.names)
+        print(f"Built face index with {self.index.centroids.shape[0]} lists "
+              f"in {time.time() - start_time:.2f}s")
+
+    def index_outdated(self):
+        # Whether the gallery needs a (re)trained IVF index
+        param = self.index_param
+        if not param.enabled or len(self.names) < param.exact_search_limit:
+            return False
+        return self.index is None or len(self.names) > self.index_trained_size * param.retrain_growth
+
+    def update_index(self):
+        # Build or retrain the IVF index when needed and persist it with a matching snapshot,
+        # so training happens at load / enrollment time and only once per gallery growth step
+        # Returns whether a snapshot was written
+        if not self.index_outdated():
+            return False
+        self.build_index()
+        self.save_faces()
+        return True
+
+    def use_index(self):
+        # Whether searches should go through the IVF index (never trained inside a search)
+        param = self.index_param
+        return (param.enabled and self.index is not None
+                and len(self.names) >= param.exact_search_limit)
+
+    @property
+    def embeddings(self):
+        # (N, D) view of the stored rows in use (storage dtype), None if the database is empty
+        if not self.names:
+            return None
+        return self._matrix[:len(self.names)]
+
+    @property
+    def scales(self):
+        # (N,) per-row scales matching self.embeddings
+        if not self.names:
+            return None
+        return self._scales[:len(self.names)]
+
+    def decode_rows(self, rows):
+        # Stored rows (index array or slice) as float32 embeddings
+        return decode_embeddings(self._matrix[rows], self._scales[rows])
+
+    def score(self, queries, chunk_size=65536):
+        # Float32 dot products of (M, D) queries against every stored row, returns (M, N)
+        # Quantized rows are decoded in chunks so no full float32 copy of the gallery is made
+        if self._matrix.dtype == np.float32:
+            return queries @ self.embeddings.T
+        count = len(self.names)
+        scores = np.empty((queries.shape[0], count), dtype=np.float32)
+        for start in range(0, count, chunk_size):
+            stop = min(start + chunk_size, count)
+            scores[:, start:stop] = queries @ self.decode_rows(slice(start, stop)).T
+        return scores
+
+    @staticmethod
+    def _as_queries(embeddings):
+        # (M, D) L2-normalized float32 queries
+        queries = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return queries / norms
 
     def save_faces(self):
-        # Save face data to file
-        # Convert numpy arrays to lists for JSON serialization
-        save_data = {name: embedding.tolist() for name, embedding in self.face_data.items()}
-        with open(self.face_data_file, 'w') as f:
-            json.dump(save_data, f)
-        print(f"Saved {len(self.face_data)} face data entries")
+        # Save a snapshot of the face data to the binary face store and empty the log
+        if isinstance(self._matrix, np.memmap):
+            # Detach from the mapped file before it is replaced
+            self._matrix = np.array(self._matrix)
+            self._scales = np.array(self._scales)
+        write_face_store(self.face_store_file, self.names, self.embeddings, self.scales, self.storage_dtype)
+        if self.index is not None:
+            self.index.save(self.face_index_file, len(self.names))
+        elif os.path.exists(self.face_index_file):
+            # An index saved for an older version of the gallery is no longer valid
+            os.remove(self.face_index_file)
+        # Log records are idempotent, so a crash before this point only replays them again
+        self.face_log.reset()
+        print(f"Saved {len(self.names)} face data entries")
+
+    def compact_if_needed(self):
+        # Fold the log into a new snapshot once it holds enough records
+        if self.face_log.records >= FACE_LOG_COMPACT_RECORDS:
+            self.save_faces()
+
+    def enroll_face(self, name, embedding):
+        # Durably add (or replace) a face: one fsynced log record, independent of the gallery size
+        self.add_face(name, embedding)
+        self.face_log.append_enroll(name, self.face_data[name])
+        if not self.update_index():
+            self.compact_if_needed()
+
+    def add_face(self, name, embedding):
+        # Add (or replace) a face and keep the search matrix in sync
+        data, scales = encode_embeddings(np.ravel(embedding), self.storage_dtype)
+        embedding = decode_embeddings(data, scales)[0]
+        if name in self.name_index:
+            self._matrix[self.name_index[name]] = data[0]
+            self._scales[self.name_index[name]] = scales[0]
+            if self.index is not None:
+                self.index.update(self.name_index[name], embedding)
+        else:
+            count = len(self.names)
+            if self._matrix is None:
+                self._matrix = np.empty((16, data.shape[1]), dtype=STORAGE_DTYPES[self.storage_dtype])
+                self._scales = np.empty(16, dtype=np.float32)
+            elif count == self._matrix.shape[0]:
+                # Double the capacity so that enrollment stays amortized O(D)
+                grown = np.empty((count * 2, self._matrix.shape[1]), dtype=self._matrix.dtype)
+                grown[:count] = self._matrix
+                self._matrix = grown
+                grown_scales = np.empty(count * 2, dtype=np.float32)
+                grown_scales[:count] = self._scales
+                self._scales = grown_scales
+            self._matrix[count] = data[0]
+            self._scales[count] = scales[0]
+            self.name_index[name] = count
+            self.names.append(name)
+            if self.index is not None:
+                self.index.add(count, embedding)
+
+    def _remove_row(self, name):
+        # Remove a name from the search matrix by moving the last row into its slot
+        index = self.name_index.pop(name)
+        last = len(self.names) - 1
+        if self.index is not None:
+            self.index.remove(index, last)
+        if index != last:
+            last_name = self.names[last]
+            self._matrix[index] = self._matrix[last]
+            self._scales[index] = self._scales[last]
+            self.names[index] = last_name
+            self.name_index[last_name] = index
+        self.names.pop()
 
     def delete_faces(self, name):
         # Delete face data by name
-        if name in self.face_data:
-            del self.face_data[name]
-            # Synchronize and save to local file
-            self.save_faces()
+        if name in self.name_index:
+            self._remove_row(name)
+            # Record the deletion in the log
+            self.face_log.append_delete(name)
+            self.compact_if_needed()
             print(f"Successfully deleted face data for {name}")
             return True
         else:
             print(f"No face data found for {name}")
             return False
 
+    def search(self, input_embedding, k=1, n_probe=None):
+        # Return the top-k (similarities, names) of the input face, sorted by descending similarity
+        if not self.names:
+            return np.empty(0, dtype=np.float32), []
+
+        query = self._as_queries(input_embedding)[0]
+
+        # Large galleries: only score the rows of the closest IVF lists
+        if self.use_index():
+            scores, rows = self.index.search(self.decode_rows, query, k, n_probe)
+            return scores, [self.names[i] for i in rows]
+
+        # One matrix-vector product scores the whole gallery
+        scores = self.score(query[np.newaxis, :])[0]
+
+        k = min(k, len(scores))
+        if k == 1:
+            top = np.array([np.argmax(scores)])
+        else:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+        return scores[top], [self.names[i] for i in top]
+
     def compare_faces(self, input_embedding, threshold):
         # Find the vector most matching the input face feature in the current database (must exceed the matching threshold), return similarity and name
-        if not self.face_data:
+        if not self.names:
             print("Face database is empty, cannot perform comparison")
             return 0, "Unknown"
 
@@ -59,19 +340,88 @@ class FaceDatabase:
         max_similarity = 0
         most_similar_name = "Unknown"
 
-        for name, db_embedding in self.face_data.items():
-            # Calculate similarity
-            similarity = np.dot(input_embedding, db_embedding)
+        similarities, names = self.search(input_embedding, k=1)
 
-            # If similarity exceeds the threshold, it is considered a successful match
-            if similarity > threshold:
-                if similarity > max_similarity:
-                    max_similarity = similarity
-                    most_similar_name = name
+        # If similarity exceeds the threshold, it is considered a successful match
+        if len(similarities) and similarities[0] > threshold:
+            max_similarity = float(similarities[0])
+            most_similar_name = names[0]
 
         print(f"Maximum similarity: {max_similarity:.4f}, corresponding name: {most_similar_name}")
         return max_similarity, most_similar_name
 
+    def identify_batch(self, embeddings, threshold, k=1, chunk_size=None):
+        # Exact top-k identification of an (M, D) batch of embeddings, without per-item logging
+        # Returns (names, scores), both (M, k) arrays sorted by descending score;
+        # names whose score does not exceed the threshold are reported as "Unknown"
+        queries = self._as_queries(embeddings)
+        count = queries.shape[0]
+        k = min(k, len(self.names))
+        names = np.full((count, k), "Unknown", dtype=object)
+        scores = np.zeros((count, k), dtype=np.float32)
+        if k == 0:
+            return names, scores
+
+        # Bound each (query chunk, gallery chunk) score block to about 16M floats
+        gallery_count = len(self.names)
+        gallery_chunk = min(gallery_count, 65536)
+        if chunk_size is None:
+            chunk_size = max(1, min(4096, (1 << 24) // gallery_chunk))
+
+        gallery_names = np.array(self.names, dtype=object)
+        for start in range(0, count, chunk_size):
+            chunk = queries[start:start + chunk_size]
+            best_scores = np.empty((chunk.shape[0], 0), dtype=np.float32)
+            best_rows = np.empty((chunk.shape[0], 0), dtype=np.int64)
+            for gallery_start in range(0, gallery_count, gallery_chunk):
+                rows = slice(gallery_start, min(gallery_start + gallery_chunk, gallery_count))
+                block = chunk @ self.decode_rows(rows).T
+                # Keep the running top-k over the gallery chunks seen so far
+                block = np.hstack([best_scores, block])
+                block_rows = np.hstack([best_rows, np.broadcast_to(
+                    np.arange(rows.start, rows.stop), (chunk.shape[0], rows.stop - rows.start))])
+                if k < block.shape[1]:
+                    top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+                    block = np.take_along_axis(block, top, axis=1)
+                    block_rows = np.take_along_axis(block_rows, top, axis=1)
+                best_scores, best_rows = block, block_rows
+
+            order = np.argsort(-best_scores, axis=1)
+            top_scores = np.take_along_axis(best_scores, order, axis=1)
+            top = np.take_along_axis(best_rows, order, axis=1)
+            scores[start:start + chunk_size] = top_scores
+            names[start:start + chunk_size] = np.where(top_scores > threshold, gallery_names[top], "Unknown")
+        return names, scores
+
+    def get_cohort(self, name, size):
+        # Random impostor cohort: embeddings of up to `size` enrolled users other than `name`
+        others = len(self.names) - (1 if name in self.name_index else 0)
+        size = min(size, others)
+        if size <= 0:
+            return None
+        rng = np.random.default_rng()
+        rows = rng.choice(len(self.names), min(size + 1, len(self.names)), replace=False)
+        rows = rows[rows != self.name_index.get(name, -1)][:size]
+        return self.decode_rows(np.sort(rows))
+
+    def verify_face(self, input_embedding, name, threshold, cohort=None):
+        # 1:1 verification against the claimed user's template, return similarity and name like compare_faces
+        # With an impostor cohort the claimed user must also score higher than every cohort member
+        if name not in self.name_index:
+            print(f"No face data found for {name}")
+            return 0, "Unknown"
+
+        query = self._as_queries(input_embedding)[0]
+        similarity = float(self.decode_rows([self.name_index[name]])[0] @ query)
+        impostor_similarity = float(np.max(cohort @ query)) if cohort is not None else -1.0
+
+        if similarity > threshold and similarity > impostor_similarity:
+            print(f"Claimed identity similarity: {similarity:.4f}, name: {name}")
+            return similarity, name
+
+        print(f"Claimed identity similarity: {similarity:.4f} (cohort max: {impostor_similarity:.4f}), rejected")
+        return 0, "Unknown"
+
     def show_names(self):
-        for name in self.face_data:
-            print(name)
\ No newline at end of file
+        for name in self.names:
+            print(name)
@@ -1,37 +1,57 @@
 import time
 import cv2
-from insightface.app import FaceAnalysis
 
-from config.settings import FACE_MATCHING_THRESHOLD
-from src.face_recognition.face_database import FaceDatabase
-from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+from config.settings import FACE_MATCHING_THRESHOLD, FACE_MATCHING_MODE, FACE_VERIFY_COHORT_SIZE, DisplayParam
+from src.face_recognition.model_pool import get_face_analysis, get_liveness_model, get_face_database
+from src.face_recognition.face_pipeline import FacePipeline, largest_face
+from src.face_recognition.liveness_scheduler import LivenessScheduler
+from src.face_recognition.frame_source import open_capture, mirror_for_display
 
 class FaceDetector:
     def __init__(self):
-        # Initialize face analysis application
-        self.app = FaceAnalysis(name='buffalo_l')
-        self.app.prepare(ctx_id=-1)  # Use GPU; set ctx_id=-1 if using CPU
+        # Face analysis application, liveness model and face database are shared through the model pool
+        self.app = get_face_analysis()
+        # Per-frame detection/recognition (optionally detect-then-track)
+        self.pipeline = FacePipeline(self.app)
 
         # Dictionary to store face feature vectors
-        self.face_database = FaceDatabase()
-
-        self.liveness_model = AntiSpoofPredict()
-
-    def run(self, username):
+        self.face_database = get_face_database()
+
+        self.liveness_model = get_liveness_model()
+        # Reuses liveness results of a steady face between model runs
+        self.liveness = LivenessScheduler(self.liveness_model)
+
+        # Structured result of the last run (see run)
+        self.last_result = None
+
+    def run(self, username=None, source=None, headless=None):
+        # With a username the live face is verified 1:1 against that user (FACE_MATCHING_MODE = "verify"),
+        # without one (kiosk mode) it is identified 1:N and the recognised name is returned.
+        # source: camera index, video file or image directory (None = configured camera)
+        # headless: no window and no overlay drawing (None = DisplayParam.headless). The return value
+        # is the same either way; the structured result dict is stored in self.last_result.
+        headless = DisplayParam.headless if headless is None else headless
+        verify_mode = username is not None and FACE_MATCHING_MODE == "verify"
+        cohort = None
+        if verify_mode and FACE_VERIFY_COHORT_SIZE > 0:
+            cohort = self.face_database.get_cohort(username, FACE_VERIFY_COHORT_SIZE)
+
+        self.pipeline.reset()
+        self.liveness.reset()
         start_time = time.time()
         last_detect_time = 0
         detection_counts = 0
         face_detection = False
         identity_result = None
+        decision_time = None
+        frame_results = []
+        status = "timeout"
 
-        # Initialize camera
-        cap = cv2.VideoCapture(0)  # 0 indicates the default camera
-
-        # Set camera parameters (optional)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        # Initialize camera (frames are read on a producer thread, see CaptureParam)
+        cap = open_capture(source)
 
-        print("Press 'q' to exit the program")
+        if not headless:
+            print("Press 'q' to exit the program")
 
         while True:
             current_time = time.time()
@@ -39,38 +59,51 @@ class FaceDetector:
             ret, frame = cap.read()
             if not ret:
                 print("Failed to get video frame")
+                status = "no_frame"
                 break
 
-            # Horizontally flip the image (mirror effect)
-            frame = cv2.flip(frame, 1)
-
             # Perform face detection and analysis
-            faces = self.app.get(frame)
-
-            if len(faces) == 0:
-                # Display prompt
-                cv2.putText(frame, "No face detected. Please adjust your position", (250, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            else:
-                # Display the number of detected faces
-                cv2.putText(frame, f"Faces: {len(faces)}", (250, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-
+            step_time = time.perf_counter()
+            faces = self.pipeline.get(frame)
+            frame_result = {"time": current_time - start_time, "faces": len(faces),
+                            "detect_ms": (time.perf_counter() - step_time) * 1000}
+            frame_results.append(frame_result)
+
+            label = None
+            if len(faces) > 0:
                 # Get the largest face (calculated by area)
-                face = max(faces, key=lambda f: (f.bbox[2] - f.bbox[0]) * (f.bbox[3] - f.bbox[1]))
+                face = largest_face(faces)
 
                 # Get face bounding box
                 bbox = face.bbox.astype(int)
 
                 # Liveness detection
-                is_real = self.liveness_model.predict(frame, bbox)
+                step_time = time.perf_counter()
+                is_real, real_probability, inferred = self.liveness.check(frame, bbox)
+                frame_result["liveness_ms"] = (time.perf_counter() - step_time) * 1000
+                frame_result["real"] = is_real
+                frame_result["real_probability"] = real_probability
+                frame_result["liveness_inferred"] = inferred
+                if inferred:
+                    # Ensemble: per-model latency of this inference
+                    for name, latency in getattr(self.liveness_model, "last_latency", {}).items():
+                        if name != "total":
+                            frame_result[f"liveness[{name}]_ms"] = latency
                 if is_real:
                     print("It's a real face")
                     # Get feature vector
                     embedding = face.normed_embedding
 
                     # Get comparison result
-                    max_similarity, identity = self.face_database.compare_faces(embedding, FACE_MATCHING_THRESHOLD)
+                    step_time = time.perf_counter()
+                    if verify_mode:
+                        max_similarity, identity = self.face_database.verify_face(
+                            embedding, username, FACE_MATCHING_THRESHOLD, cohort)
+                    else:
+                        max_similarity, identity = self.face_database.compare_faces(embedding, FACE_MATCHING_THRESHOLD)
+                    frame_result["match_ms"] = (time.perf_counter() - step_time) * 1000
+                    frame_result["score"] = float(max_similarity)
+                    frame_result["identity"] = identity
 
                     if max_similarity > 0 & (current_time - last_detect_time > 0.5):
                         if not face_detection:
@@ -79,6 +112,7 @@ class FaceDetector:
                             identity_result = identity
                             if detection_counts > 5:
                                 face_detection = True
+                                decision_time = current_time - start_time
 
                     # Display recognition result
                     label = f"{identity} ({max_similarity:.2f})"
@@ -88,18 +122,31 @@ class FaceDetector:
                     label = f"Fake Face"
                     color = (0, 0, 255) # Red box
 
-                # Draw bounding box
-                cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), color, 2)
-                # Display label
-                cv2.putText(frame, label, (bbox[0], bbox[1] - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-
-            # Display image
-            cv2.imshow('Real-time Face Detection', frame)
-
-            # Exit if face is detected
+            if not headless:
+                # Mirror only the displayed image; detection runs on the original frame
+                display, bbox_to_display = mirror_for_display(frame, DisplayParam.mirror)
+                if len(faces) == 0:
+                    # Display prompt
+                    cv2.putText(display, "No face detected. Please adjust your position", (250, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                else:
+                    # Display the number of detected faces
+                    cv2.putText(display, f"Faces: {len(faces)}", (250, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                    x1, y1, x2, y2 = bbox_to_display(bbox)
+                    # Draw bounding box
+                    cv2.rectangle(display, (x1, y1), (x2, y2), color, 2)
+                    # Display label
+                    cv2.putText(display, label, (x1, y1 - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+                # Display image
+                cv2.imshow('Real-time Face Detection', display)
+
+            # Exit if face is detected (headless runs do not need to keep showing the result)
             if face_detection:
-                if current_time - last_detect_time > 2:
+                status = "decided"
+                if headless or current_time - last_detect_time > 2:
                     break
 
             # Detection timeout
@@ -108,14 +155,31 @@ class FaceDetector:
                 break
 
             # Press 'q' to exit
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if not headless and cv2.waitKey(1) & 0xFF == ord('q'):
+                status = "decided" if face_detection else "quit"
                 break
 
         # Release resources
         cap.release()
-        cv2.destroyAllWindows()
+        if not headless:
+            cv2.destroyAllWindows()
 
-        if identity_result == username:
-            return True
+        if username is None:
+            ok = identity_result is not None
         else:
-            return False
\ No newline at end of file
+            ok = identity_result == username
+        total_time = time.time() - start_time
+        self.last_result = {
+            "ok": ok,
+            "status": status,
+            "identity": identity_result,
+            "frames": frame_results,
+            "total_time": total_time,
+            "time_to_decision": decision_time,
+            "fps": len(frame_results) / total_time if total_time > 0 else 0.0,
+            "liveness_inferences": self.liveness.inferences,
+        }
+
+        if username is None:
+            return identity_result
+        return ok
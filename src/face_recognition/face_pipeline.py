@@ -0,0 +1,121 @@
+import numpy as np
+
+from config.settings import FacePipelineParam, FaceTrackingParam
+
+
+def face_area(face):
+    return (face.bbox[2] - face.bbox[0]) * (face.bbox[3] - face.bbox[1])
+
+
+def largest_face(faces):
+    # Get the largest face (calculated by area)
+    return max(faces, key=face_area)
+
+
+class FacePipeline:
+    """
+    Per-frame face analysis on top of an insightface FaceAnalysis app
+    - Tracking mode (FaceTrackingParam.enabled): the full-frame detector runs every
+      full_detect_interval frames or when the face is lost; in between, detection only runs
+      on an enlarged region of interest around the previous box at a small input size
+    - Largest-face-only mode (FacePipelineParam.largest_face_only): detection runs first and
+      the recognition model only runs on the largest face, so the cost does not grow with the
+      number of people in view; the other faces only carry bbox, kps and det_score
+    - Adaptive input size (FacePipelineParam.adaptive_det_size): full-frame detection starts
+      at a small input size and escalates only when nothing (or only a marginal face) is found
+    - Returns insightface Face objects in frame coordinates, like FaceAnalysis.get()
+    """
+
+    def __init__(self, app, tracking_param=None, param=None):
+        self.app = app
+        self.tracking_param = tracking_param or FaceTrackingParam()
+        self.param = param or FacePipelineParam()
+        self.reset()
+
+    def reset(self):
+        # Forget the tracked face (call at the start of every camera session)
+        self.track_bbox = None
+        self.frames_since_detect = 0
+        self.full_detections = 0
+        self.roi_detections = 0
+        # Full-frame detections per input size, and the size used for the last one
+        self.det_size_counts = {}
+        self.last_det_size = None
+
+    def get(self, frame):
+        param = self.tracking_param
+        if not param.enabled:
+            return self._get_full(frame)
+
+        faces = []
+        # Counted before the check, so the full-frame detector runs on every
+        # full_detect_interval-th frame
+        self.frames_since_detect += 1
+        if self.track_bbox is not None and self.frames_since_detect < param.full_detect_interval:
+            faces = self._get_roi(frame, self.track_bbox)
+            if faces:
+                self.roi_detections += 1
+
+        # Periodic re-detection, or the track was lost
+        if not faces:
+            faces = self._get_full(frame)
+            self.frames_since_detect = 0
+            self.full_detections += 1
+
+        self.track_bbox = largest_face(faces).bbox.copy() if faces else None
+        return faces
+
+    def _roi(self, frame, bbox):
+        # Previous box enlarged by roi_scale around its centre, clipped to the frame
+        height, width = frame.shape[:2]
+        center_x, center_y = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+        half_w = (bbox[2] - bbox[0]) * self.tracking_param.roi_scale / 2
+        half_h = (bbox[3] - bbox[1]) * self.tracking_param.roi_scale / 2
+        x1 = int(max(0, center_x - half_w))
+        y1 = int(max(0, center_y - half_h))
+        x2 = int(min(width, center_x + half_w))
+        y2 = int(min(height, center_y + half_h))
+        return x1, y1, x2, y2
+
+    def _get_full(self, frame):
+        param = self.param
+        det_sizes = param.adaptive_det_sizes if param.adaptive_det_size else [None]
+        best, best_score = None, -1.0
+        for det_size in det_sizes:
+            det_size = tuple(det_size) if det_size is not None else None
+            bboxes, kpss = self.app.det_model.detect(frame, input_size=det_size, max_num=0, metric='default')
+            self.last_det_size = det_size or tuple(self.app.det_model.input_size)
+            self.det_size_counts[self.last_det_size] = self.det_size_counts.get(self.last_det_size, 0) + 1
+            score = float(bboxes[:, 4].max()) if bboxes.shape[0] > 0 else -1.0
+            if score > best_score:
+                best, best_score = (bboxes, kpss), score
+            # Confident face found, no need for a larger input
+            if score >= param.escalate_score:
+                break
+        return self._analyze(frame, *best)
+
+    def _get_roi(self, frame, bbox):
+        x1, y1, x2, y2 = self._roi(frame, bbox)
+        if x2 - x1 < 16 or y2 - y1 < 16:
+            return []
+        bboxes, kpss = self.app.det_model.detect(frame[y1:y2, x1:x2],
+                                                 input_size=tuple(self.tracking_param.roi_det_size),
+                                                 max_num=0, metric='default')
+        return self._analyze(frame, bboxes, kpss, offset=(x1, y1))
+
+    def _analyze(self, frame, bboxes, kpss, offset=(0, 0)):
+        # Face objects for detector output (boxes of a region are shifted by offset into the frame)
+        from insightface.app.common import Face
+        offset = np.array(offset, dtype=np.float32)
+        faces = []
+        for i in range(bboxes.shape[0]):
+            kps = kpss[i] + offset if kpss is not None else None
+            faces.append(Face(bbox=bboxes[i, 0:4] + np.tile(offset, 2), kps=kps, det_score=bboxes[i, 4]))
+
+        # The other models (recognition) work on the full frame with frame coordinates
+        for face in ([largest_face(faces)] if self.param.largest_face_only and faces else faces):
+            for taskname, model in self.app.models.items():
+                if taskname == 'detection':
+                    continue
+                model.get(frame, face)
+        return faces
@@ -4,10 +4,11 @@ import os
 import numpy as np
 from datetime import datetime
 
-from insightface.app import FaceAnalysis
-from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
-from src.face_recognition.face_database import FaceDatabase
-from config.settings import RegistionParam, REGISTER_FACE_MATCHING_THRESHOLD
+from src.face_recognition.model_pool import get_face_analysis, get_liveness_model, get_face_database
+from src.face_recognition.face_pipeline import FacePipeline, largest_face
+from src.face_recognition.liveness_scheduler import LivenessScheduler
+from src.face_recognition.frame_source import open_capture, mirror_for_display
+from config.settings import RegistionParam, REGISTER_FACE_MATCHING_THRESHOLD, DisplayParam
 
 FACE_STATUS_VALID = 0
 FACE_STATUS_INVALID = 1
@@ -15,20 +16,26 @@ FACE_STATUS_DUPLICATE = 2
 
 class FaceRecorder:
     def __init__(self):
-        # Initialize face analysis application
-        self.app = FaceAnalysis(name='buffalo_l')
-        self.app.prepare(ctx_id=-1)  # Use GPU; set ctx_id=-1 if using CPU
+        # Face analysis application, liveness model and face database are shared through the model pool
+        self.app = get_face_analysis()
+        # Per-frame detection/recognition (optionally detect-then-track)
+        self.pipeline = FacePipeline(self.app)
 
-        self.liveness_model = AntiSpoofPredict()
+        self.liveness_model = get_liveness_model()
+        # Reuses liveness results of a steady face between model runs
+        self.liveness = LivenessScheduler(self.liveness_model)
 
         # Dictionary to store face feature vectors
-        self.face_database = FaceDatabase()
+        self.face_database = get_face_database()
         # Registration-related parameters
         self.param = RegistionParam()
 
+        # Structured result of the last run (see run)
+        self.last_result = None
+
     def check_face_validity(self, frame, face, bbox):
         # Liveness detection
-        is_real = self.liveness_model.predict(frame, bbox)
+        is_real, _, _ = self.liveness.check(frame, bbox)
 
         if is_real & (face.det_score > self.param.confidence_threshold):
             embedding = face.normed_embedding
@@ -43,58 +50,67 @@ class FaceRecorder:
 
     def register_face(self, name, embedding, face_img):
         """Register a new face"""
-        self.face_database.face_data[name] = embedding
+        self.face_database.enroll_face(name, embedding)
 
         # Save face image
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(self.face_database.save_dir, exist_ok=True)
         face_filename = os.path.join(self.face_database.save_dir, f"{name}_{timestamp}.jpg")
         cv2.imwrite(face_filename, face_img)
 
-        # Save data to file
-        self.face_database.save_faces()
-
         print(f"Successfully registered: {name}")
         return True
 
-    def run(self, name):
-        """Run the main program"""
+    def run(self, name, source=None, headless=None):
+        """Run the main program (source: camera index, video file or image directory; None = configured camera)"""
+        # headless: no window and no overlay drawing (None = DisplayParam.headless). The return value
+        # is the same either way; the structured result dict is stored in self.last_result.
+        headless = DisplayParam.headless if headless is None else headless
         # Record start time
+        self.pipeline.reset()
+        self.liveness.reset()
         start_time = time.time()
         # Time of the last valid frame
         last_collect_time = 0
         # Store collected valid feature vectors
         collected_embedding = []
         registration_completion = False
+        decision_time = None
+        frame_results = []
+        status = "timeout"
 
         # Initialize camera
         print("Turn on the camera")
-        cap = cv2.VideoCapture(0)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        cap = open_capture(source)
 
         while True:
             elapsed_time = time.time() - start_time
             ret, frame = cap.read()
             if not ret:
                 print("Failed to get video frame")
+                status = "no_frame"
                 break
 
-            # Horizontally flip the image (mirror effect)
-            frame = cv2.flip(frame, 1)
-
-            # Detect faces (without extracting features, for display only)
-            faces = self.app.get(frame)
+            # Detect faces
+            step_time = time.perf_counter()
+            faces = self.pipeline.get(frame)
+            frame_result = {"time": elapsed_time, "faces": len(faces),
+                            "detect_ms": (time.perf_counter() - step_time) * 1000}
+            frame_results.append(frame_result)
 
             if len(faces) == 0:
                 # Prompt: No face detected
                 face_valid = FACE_STATUS_INVALID
             else:
                 # Get the largest face (calculated by area) for registration
-                face = max(faces, key=lambda f: (f.bbox[2] - f.bbox[0]) * (f.bbox[3] - f.bbox[1]))
+                face = largest_face(faces)
                 bbox = face.bbox.astype(int)
                 face_img = frame[bbox[1]:bbox[3], bbox[0]:bbox[2]]
 
+                step_time = time.perf_counter()
                 face_valid = self.check_face_validity(frame, face, bbox)
+                frame_result["check_ms"] = (time.perf_counter() - step_time) * 1000
+                frame_result["det_score"] = float(face.det_score)
 
                 if face_valid == FACE_STATUS_VALID:
                     label = "Valid Face"
@@ -105,20 +121,10 @@ class FaceRecorder:
                 else:
                     label = "Invalid Face"
                     color = (0, 0, 255)
-
-                # Draw bounding box
-                cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), color, 2)
-                # Display label
-                cv2.putText(frame, label, (bbox[0], bbox[1] - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+            frame_result["face_status"] = face_valid
 
             # Determine current registration status
-            if registration_completion:
-                cv2.putText(frame, f"Face Detection Complete!", (200, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            else:
-                cv2.putText(frame, f"Face Detection in Process...", (200, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+            if not registration_completion:
                 # Require a certain interval from the last valid frame
                 if face_valid == FACE_STATUS_VALID & (time.time() - last_collect_time > self.param.frame_interval):
                     # Extract feature vector
@@ -130,27 +136,51 @@ class FaceRecorder:
                     print("debug: saved face embedding:", len(collected_embedding))
                     if len(collected_embedding) >= self.param.required_frames:
                         # Collected enough valid frames, proceed with registration
-                        avg_embedding = np.mean(collected_embedding, axis=0)
-                        save_img = face_img
+                        avg_embedding = np.mean(collected_embedding, axis=0).astype(np.float32)
+                        # The mean of unit vectors is shorter than 1, renormalize it for cosine matching
+                        avg_embedding /= np.linalg.norm(avg_embedding)
+                        save_img = face_img.copy()
                         print("Register Successfully!")
                         registration_completion = True
+                        decision_time = time.time() - start_time
+                        status = "registered"
+
+            if not headless:
+                # Mirror only the displayed image; detection runs on the original frame
+                display, bbox_to_display = mirror_for_display(frame, DisplayParam.mirror)
+                if len(faces) > 0:
+                    x1, y1, x2, y2 = bbox_to_display(bbox)
+                    # Draw bounding box
+                    cv2.rectangle(display, (x1, y1), (x2, y2), color, 2)
+                    # Display label
+                    cv2.putText(display, label, (x1, y1 - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+                if registration_completion:
+                    cv2.putText(display, f"Face Detection Complete!", (200, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                else:
+                    cv2.putText(display, f"Face Detection in Process...", (200, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
 
-            cv2.putText(frame, "Press 'q' to quit", (500, 450),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                cv2.putText(display, "Press 'q' to quit", (500, 450),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
 
-            # Display image
-            cv2.imshow('Face Registration', frame)
+                # Display image
+                cv2.imshow('Face Registration', display)
 
-            # Keyboard operation
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                print("User manually exited the program")
-                break
+                # Keyboard operation
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    print("User manually exited the program")
+                    if not registration_completion:
+                        status = "quit"
+                    break
 
             # Check exit conditions
             if registration_completion:
-                # Display for 2 seconds after successful registration before exiting
-                if time.time() - last_collect_time > 3:
+                # Display for 2 seconds after successful registration before exiting (headless: exit now)
+                if headless or time.time() - last_collect_time > 3:
                     break
             elif elapsed_time > self.param.detection_time_limit:
                 print("Registration time exceeded the limit!")
@@ -160,7 +190,18 @@ class FaceRecorder:
             self.register_face(name, avg_embedding, save_img)
         # Release resources
         cap.release()
-        cv2.destroyAllWindows()
+        if not headless:
+            cv2.destroyAllWindows()
         print("Program exited")
 
-        return registration_completion
\ No newline at end of file
+        total_time = time.time() - start_time
+        self.last_result = {
+            "ok": registration_completion,
+            "status": status,
+            "frames": frame_results,
+            "total_time": total_time,
+            "time_to_decision": decision_time,
+            "fps": len(frame_results) / total_time if total_time > 0 else 0.0,
+            "liveness_inferences": self.liveness.inferences,
+        }
+        return registration_completion
@@ -0,0 +1,190 @@
+import os
+import struct
+import zlib
+import numpy as np
+
+# Binary face store layout (little endian):
+#   header      : magic(8s) version(I) count(I) dim(I) names_size(I) dtype_code(I)
+#   names table : UTF-8 names separated by '\0', padded so the matrix starts on a 64-byte boundary
+#   matrix      : count x dim embeddings in the storage dtype, row i belongs to name i, padded to 64 bytes
+#   scales      : count float32 per-row scales (int8 storage; 1.0 for float storage)
+# Version 1 files have no dtype_code and no scales and always store float32.
+STORE_MAGIC = b"EEFACEDB"
+STORE_VERSION = 2
+HEADER_FORMAT = "<8sIIIII"
+HEADER_FORMAT_V1 = "<8sIIII"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HEADER_SIZE_V1 = struct.calcsize(HEADER_FORMAT_V1)
+MATRIX_ALIGN = 64
+
+# Supported storage precisions
+STORAGE_DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+DTYPE_CODES = {"float32": 0, "float16": 1, "int8": 2}
+CODE_DTYPES = {code: name for name, code in DTYPE_CODES.items()}
+
+
+def _align(offset):
+    return (offset + MATRIX_ALIGN - 1) // MATRIX_ALIGN * MATRIX_ALIGN
+
+
+def encode_embeddings(matrix, storage_dtype):
+    # L2-normalize float embeddings and convert them to the storage dtype, returns (data, scales)
+    # int8 rows are scaled per vector so that the largest component maps to +-127
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix = matrix / norms
+
+    if storage_dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127
+        scales[scales == 0] = 1
+        data = np.rint(matrix / scales[:, np.newaxis]).astype(np.int8)
+        return data, scales.astype(np.float32)
+    if storage_dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported face storage dtype: {storage_dtype}")
+    return matrix.astype(STORAGE_DTYPES[storage_dtype]), np.ones(matrix.shape[0], dtype=np.float32)
+
+
+def decode_embeddings(data, scales):
+    # Convert stored rows back to float32 embeddings
+    if data.dtype == np.float32:
+        return data
+    matrix = data.astype(np.float32)
+    if data.dtype == np.int8:
+        matrix *= scales[:, np.newaxis]
+    return matrix
+
+
+def write_face_store(path, names, data, scales, storage_dtype):
+    # Write names, stored (N, D) rows and their scales to path; the file is replaced atomically
+    count = len(names)
+    dim = data.shape[1] if count else 0
+    data = np.ascontiguousarray(data[:count], dtype=STORAGE_DTYPES[storage_dtype]) if count else None
+    names_bytes = "\0".join(names).encode("utf-8")
+    matrix_offset = _align(HEADER_SIZE + len(names_bytes))
+
+    # data/ is not part of the repository, create it on first write
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = str(path) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, STORE_MAGIC, STORE_VERSION, count, dim,
+                            len(names_bytes), DTYPE_CODES[storage_dtype]))
+        f.write(names_bytes)
+        f.write(b"\0" * (matrix_offset - HEADER_SIZE - len(names_bytes)))
+        if count:
+            f.write(data.tobytes())
+            f.write(b"\0" * (_align(data.nbytes) - data.nbytes))
+            f.write(np.ascontiguousarray(scales[:count], dtype=np.float32).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_face_store(path):
+    # Return (names, data, scales, storage_dtype); data and scales are copy-on-write memmaps
+    # so startup does not read the embeddings
+    with open(path, "rb") as f:
+        magic, version = struct.unpack("<8sI", f.read(12))
+        if magic != STORE_MAGIC:
+            raise ValueError(f"{path} is not a face store file")
+        f.seek(0)
+        if version == 1:
+            _, _, count, dim, names_size = struct.unpack(HEADER_FORMAT_V1, f.read(HEADER_SIZE_V1))
+            header_size, dtype_code = HEADER_SIZE_V1, DTYPE_CODES["float32"]
+        elif version == STORE_VERSION:
+            _, _, count, dim, names_size, dtype_code = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+            header_size = HEADER_SIZE
+        else:
+            raise ValueError(f"Unsupported face store version: {version}")
+        names_bytes = f.read(names_size)
+
+    storage_dtype = CODE_DTYPES[dtype_code]
+    if count == 0:
+        return [], None, None, storage_dtype
+    names = names_bytes.decode("utf-8").split("\0")
+
+    dtype = STORAGE_DTYPES[storage_dtype]
+    matrix_offset = _align(header_size + names_size)
+    data = np.memmap(path, dtype=dtype, mode="c", offset=matrix_offset, shape=(count, dim))
+    if version == 1:
+        scales = np.ones(count, dtype=np.float32)
+    else:
+        scales_offset = matrix_offset + _align(count * dim * np.dtype(dtype).itemsize)
+        scales = np.memmap(path, dtype=np.float32, mode="c", offset=scales_offset, shape=(count,))
+    return names, data, scales, storage_dtype
+
+
+# Append-only enrollment log, replayed on top of the face store snapshot
+#   record : crc32(I) op(B) name_len(H) dim(I) name(UTF-8) embedding(dim float32, enroll only)
+# The crc covers everything after it, a torn record at the end of the file (crash mid-write)
+# fails the check and is dropped on replay.
+LOG_OP_ENROLL = 1
+LOG_OP_DELETE = 2
+LOG_RECORD_FORMAT = "<IBHI"
+LOG_RECORD_SIZE = struct.calcsize(LOG_RECORD_FORMAT)
+
+
+class FaceLog:
+    def __init__(self, path):
+        self.path = path
+        # Number of records currently in the log
+        self.records = 0
+
+    def _append(self, op, name, embedding=None):
+        name_bytes = name.encode("utf-8")
+        payload = b"" if embedding is None else np.ascontiguousarray(embedding, dtype=np.float32).tobytes()
+        dim = 0 if embedding is None else len(payload) // 4
+        body = struct.pack("<BHI", op, len(name_bytes), dim) + name_bytes + payload
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(struct.pack("<I", zlib.crc32(body)) + body)
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += 1
+
+    def append_enroll(self, name, embedding):
+        self._append(LOG_OP_ENROLL, name, np.ravel(embedding))
+
+    def append_delete(self, name):
+        self._append(LOG_OP_DELETE, name)
+
+    def replay(self):
+        # Return the list of valid (op, name, embedding) records; a corrupt tail is truncated away
+        if not os.path.exists(self.path):
+            self.records = 0
+            return []
+        with open(self.path, "rb") as f:
+            content = f.read()
+
+        records = []
+        offset = 0
+        while offset + LOG_RECORD_SIZE <= len(content):
+            crc, op, name_len, dim = struct.unpack_from(LOG_RECORD_FORMAT, content, offset)
+            end = offset + LOG_RECORD_SIZE + name_len + dim * 4
+            if end > len(content) or zlib.crc32(content[offset + 4:end]) != crc:
+                break
+            name_start = offset + LOG_RECORD_SIZE
+            name = content[name_start:name_start + name_len].decode("utf-8")
+            embedding = None
+            if op == LOG_OP_ENROLL:
+                embedding = np.frombuffer(content, dtype=np.float32, count=dim, offset=name_start + name_len)
+            records.append((op, name, embedding))
+            offset = end
+
+        if offset != len(content):
+            print(f"Face log: dropped {len(content) - offset} bytes of incomplete records")
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+        self.records = len(records)
+        return records
+
+    def reset(self):
+        # Empty the log once its records are contained in a snapshot
+        with open(self.path, "wb") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.records = 0
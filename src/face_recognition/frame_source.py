@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from config.settings import CaptureParam
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class ReplaySource:
+    """
+    Base class of the replayed frame sources, same read()/release() interface as cv2.VideoCapture
+    - realtime=True paces frames at the recorded frame rate, False returns them as fast as possible
+    """
+
+    def __init__(self, fps, realtime):
+        self.fps = fps if fps and fps > 0 else 30
+        self.realtime = realtime
+        self.start_time = None
+        self.index = 0
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+    def read(self):
+        ret, frame = self._next_frame()
+        if not ret:
+            return False, None
+        if self.realtime:
+            if self.start_time is None:
+                self.start_time = time.time()
+            delay = self.start_time + self.index / self.fps - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        self.index += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+class VideoFileSource(ReplaySource):
+    def __init__(self, path, realtime=True):
+        self.capture = cv2.VideoCapture(str(path))
+        if not self.capture.isOpened():
+            raise IOError(f"Cannot open video file: {path}")
+        super().__init__(self.capture.get(cv2.CAP_PROP_FPS), realtime)
+
+    def _next_frame(self):
+        return self.capture.read()
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageDirectorySource(ReplaySource):
+    def __init__(self, path, fps=30, realtime=True):
+        super().__init__(fps, realtime)
+        self.paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise IOError(f"No images found in: {path}")
+
+    def _next_frame(self):
+        while self.index < len(self.paths):
+            frame = cv2.imread(self.paths[self.index])
+            if frame is not None:
+                return True, frame
+            print(f"Skipping unreadable image: {self.paths[self.index]}")
+            del self.paths[self.index]
+        return False, None
+
+
+class ThreadedCapture:
+    """
+    Frame acquisition on a dedicated producer thread
+    - The producer keeps reading the source so a camera's internal buffer never fills up
+    - Only the newest buffer_size frames are kept; older unread frames are dropped
+      (drop_frames=False blocks the producer instead, so replayed footage is processed completely)
+    - read() has the cv2.VideoCapture signature and never returns the same frame twice
+    """
+
+    def __init__(self, capture, buffer_size=1, read_timeout=2.0, drop_frames=True):
+        self.capture = capture
+        self.read_timeout = read_timeout
+        self.drop_frames = drop_frames
+        self.frames = deque(maxlen=max(1, buffer_size))
+        self.condition = threading.Condition()
+        self.running = True
+        self.finished = False
+
+        # Counters
+        self.captured = 0
+        self.dropped = 0
+        self.processed = 0
+
+        self.thread = threading.Thread(target=self._produce, daemon=True)
+        self.thread.start()
+
+    def _produce(self):
+        while self.running:
+            ret, frame = self.capture.read()
+            with self.condition:
+                if not ret:
+                    self.finished = True
+                    self.condition.notify_all()
+                    return
+                self.captured += 1
+                if not self.drop_frames:
+                    while self.running and len(self.frames) == self.frames.maxlen:
+                        self.condition.wait(0.1)
+                if len(self.frames) == self.frames.maxlen:
+                    self.dropped += 1
+                self.frames.append(frame)
+                self.condition.notify_all()
+
+    def read(self):
+        with self.condition:
+            deadline = time.time() + self.read_timeout
+            while not self.frames and not self.finished:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False, None
+                self.condition.wait(remaining)
+            if not self.frames:
+                return False, None
+            self.processed += 1
+            frame = self.frames.popleft()
+            self.condition.notify_all()
+            return True, frame
+
+    def stats(self):
+        return {"captured": self.captured, "processed": self.processed, "dropped": self.dropped}
+
+    def release(self):
+        self.running = False
+        self.thread.join(timeout=self.read_timeout)
+        self.capture.release()
+        print("Capture: captured {captured}, processed {processed}, dropped {dropped}".format(**self.stats()))
+
+
+def open_capture(source=None, param=None):
+    """
+    Open a frame source
+    - source None: CaptureParam.source, falling back to the camera CaptureParam.camera_index
+    - int: camera index; str/Path: video file, or directory of images replayed in name order
+    The source is wrapped in a ThreadedCapture if CaptureParam.threaded is set.
+    """
+    param = param or CaptureParam()
+    if source is None:
+        source = param.source if param.source is not None else param.camera_index
+
+    live = isinstance(source, int)
+    if live:
+        capture = cv2.VideoCapture(source)
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, param.frame_width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, param.frame_height)
+    elif os.path.isdir(source):
+        capture = ImageDirectorySource(source, param.replay_fps, param.replay_realtime)
+    else:
+        capture = VideoFileSource(source, param.replay_realtime)
+
+    if param.threaded:
+        # Real-time sources drop stale frames like a camera; fast replay processes every frame
+        drop_frames = live or param.replay_realtime
+        return ThreadedCapture(capture, param.buffer_size, param.read_timeout, drop_frames)
+    return capture
+
+
+def mirror_for_display(frame, mirror=True):
+    # Return (display image, bbox mapping); processing keeps using the original frame,
+    # only the displayed copy is mirrored and boxes are mapped onto it
+    if not mirror:
+        return frame.copy(), lambda bbox: tuple(int(v) for v in bbox[:4])
+    width = frame.shape[1]
+
+    def bbox_to_display(bbox):
+        return int(width - 1 - bbox[2]), int(bbox[1]), int(width - 1 - bbox[0]), int(bbox[3])
+
+    return cv2.flip(frame, 1), bbox_to_display
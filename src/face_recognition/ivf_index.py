@@ -0,0 +1,165 @@
+import numpy as np
+
+# Rows scored against the centroids at a time: a block of scores is block_rows x n_lists
+# float32 (about 45 MB at 4096 rows and the 2828 lists of a 500k gallery)
+BLOCK_ROWS = 4096
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index over the FaceDatabase matrix
+    - Rows are clustered around n_lists coarse centroids (spherical k-means)
+    - A query only scores the rows of its n_probe closest lists, the candidates are
+      then re-ranked with the exact float32 dot product
+    - n_probe is the recall/latency knob: more lists probed -> higher recall, slower search
+    The index stores row numbers of the database matrix, the database tells it about
+    every insert, delete and row move so it never has to be rebuilt for small changes.
+    Rows are read through a decode(rows) callable returning float32 embeddings, so the
+    index works with any storage precision of the database.
+    """
+
+    def __init__(self, n_lists, n_probe=16, train_iterations=10, train_sample=100000, seed=0,
+                 block_rows=BLOCK_ROWS):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_iterations = train_iterations
+        self.train_sample = train_sample
+        self.seed = seed
+        self.block_rows = block_rows
+
+        self.centroids = None
+        # assign[row] -> list id of that row
+        self.assign = np.empty(0, dtype=np.int32)
+        # Python lists of row numbers per list, with a numpy copy cached for searching
+        self.lists = []
+        self._list_arrays = []
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def train(self, decode, count):
+        # Cluster the first `count` rows and assign every row to its closest centroid
+        rng = np.random.default_rng(self.seed)
+        n_lists = max(1, min(self.n_lists, count))
+
+        if count > self.train_sample:
+            sample = decode(np.sort(rng.choice(count, self.train_sample, replace=False)))
+        else:
+            sample = np.array(decode(slice(0, count)), dtype=np.float32)
+
+        centroids = sample[rng.choice(sample.shape[0], n_lists, replace=False)].copy()
+        for _ in range(self.train_iterations):
+            labels = self._closest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Keep the old centroid for lists that received no rows
+            empty = norms[:, 0] == 0
+            sums[empty] = centroids[empty]
+            norms[empty] = 1
+            centroids = sums / norms
+
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.set_assignments(self._nearest_lists(decode, count))
+
+    def _closest(self, vectors, centroids):
+        # Closest centroid of every vector, scored in row blocks to bound memory
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], self.block_rows):
+            block = vectors[start:start + self.block_rows]
+            labels[start:start + self.block_rows] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def _nearest_lists(self, decode, count):
+        # Closest centroid of every stored row, decoded one block at a time
+        labels = np.empty(count, dtype=np.int32)
+        for start in range(0, count, self.block_rows):
+            block = decode(slice(start, min(start + self.block_rows, count)))
+            labels[start:start + self.block_rows] = self._closest(block, self.centroids)
+        return labels
+
+    def set_assignments(self, assign):
+        # Rebuild the inverted lists from a row -> list assignment array
+        self.assign = np.asarray(assign, dtype=np.int32).copy()
+        order = np.argsort(self.assign, kind="stable")
+        bounds = np.searchsorted(self.assign[order], np.arange(self.centroids.shape[0] + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(self.centroids.shape[0])]
+        self._list_arrays = [None] * len(self.lists)
+
+    def add(self, row, vector):
+        # Insert a new row (must be the next row number of the matrix)
+        list_id = int(np.argmax(self.centroids @ vector))
+        if row >= self.assign.shape[0]:
+            grown = np.empty(max(16, self.assign.shape[0] * 2, row + 1), dtype=np.int32)
+            grown[:self.assign.shape[0]] = self.assign
+            self.assign = grown
+        self.assign[row] = list_id
+        self.lists[list_id].append(row)
+        self._list_arrays[list_id] = None
+
+    def update(self, row, vector):
+        # A row was overwritten with a new embedding
+        old_list = int(self.assign[row])
+        new_list = int(np.argmax(self.centroids @ vector))
+        if old_list != new_list:
+            self.lists[old_list].remove(row)
+            self._list_arrays[old_list] = None
+            self.assign[row] = new_list
+            self.lists[new_list].append(row)
+            self._list_arrays[new_list] = None
+
+    def remove(self, row, last_row):
+        # Remove a row; the database moved last_row into its slot (swap-remove)
+        list_id = int(self.assign[row])
+        self.lists[list_id].remove(row)
+        self._list_arrays[list_id] = None
+        if row != last_row:
+            moved_list = int(self.assign[last_row])
+            members = self.lists[moved_list]
+            members[members.index(last_row)] = row
+            self._list_arrays[moved_list] = None
+            self.assign[row] = moved_list
+
+    def _list_array(self, list_id):
+        array = self._list_arrays[list_id]
+        if array is None:
+            array = np.array(self.lists[list_id], dtype=np.int64)
+            self._list_arrays[list_id] = array
+        return array
+
+    def candidates(self, query, n_probe=None):
+        # Row numbers stored in the n_probe lists closest to the query
+        n_probe = min(n_probe or self.n_probe, self.centroids.shape[0])
+        list_scores = self.centroids @ query
+        if n_probe < len(list_scores):
+            probe = np.argpartition(-list_scores, n_probe - 1)[:n_probe]
+        else:
+            probe = np.arange(len(list_scores))
+        return np.concatenate([self._list_array(i) for i in probe])
+
+    def search(self, decode, query, k=1, n_probe=None):
+        # Return (scores, rows) of the top-k rows, re-ranked with exact dot products
+        rows = self.candidates(query, n_probe)
+        if rows.size == 0:
+            return np.empty(0, dtype=np.float32), rows
+        scores = decode(rows) @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return scores[top], rows[top]
+
+    def save(self, path, count):
+        # Persist centroids and row assignments next to the face store
+        np.savez(path, centroids=self.centroids, assign=self.assign[:count])
+
+    def load(self, path, count, dim):
+        # Load a saved index, returns False if it does not match the current database
+        with np.load(path) as data:
+            centroids = data["centroids"]
+            assign = data["assign"]
+        if assign.shape[0] != count or centroids.shape[1] != dim:
+            return False
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.set_assignments(assign)
+        return True
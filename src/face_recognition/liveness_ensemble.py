@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from config.settings import LivenessModelParam
+from config.paths import LIVENESS_MODEL_DIR
+from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+
+
+class LivenessEnsemble:
+    """
+    Several MiniFASNet liveness models used as one
+    - Loads every .pth model of a directory; each crops the same decoded frame at the scale
+      and input size in its file name
+    - The models run concurrently on a thread pool (torch releases the GIL during inference)
+      and their softmax outputs are averaged
+    - Same predict / predict_batch interface as AntiSpoofPredict; last_latency holds the
+      per-model and total milliseconds of the last call
+    """
+
+    def __init__(self, model_dir=None, param=None):
+        param = param or LivenessModelParam()
+        model_dir = Path(model_dir or LIVENESS_MODEL_DIR)
+        model_paths = sorted(model_dir.glob("*.pth"))
+        if not model_paths:
+            raise FileNotFoundError(f"No liveness models found in {model_dir}")
+
+        self.models = {path.stem: AntiSpoofPredict(model_path=path) for path in model_paths}
+        num_classes = {model.num_classes for model in self.models.values()}
+        if len(num_classes) != 1:
+            raise ValueError(f"Liveness models in {model_dir} disagree on the number of classes")
+        self.num_classes = num_classes.pop()
+
+        workers = param.ensemble_workers or len(self.models)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="liveness")
+        self.last_latency = {}
+        print(f"Liveness ensemble: {', '.join(self.models)}")
+
+    @staticmethod
+    def _timed(model, frames_and_bboxes):
+        start_time = time.perf_counter()
+        result = model.predict_batch(frames_and_bboxes)
+        return result, (time.perf_counter() - start_time) * 1000
+
+    def predict_batch(self, frames_and_bboxes):
+        # (N, num_classes) averaged softmax probabilities, column 1 is "real"
+        frames_and_bboxes = list(frames_and_bboxes)
+        if not frames_and_bboxes:
+            return np.empty((0, self.num_classes), dtype=np.float32)
+
+        start_time = time.perf_counter()
+        futures = {name: self.executor.submit(self._timed, model, frames_and_bboxes)
+                   for name, model in self.models.items()}
+        results = {name: future.result() for name, future in futures.items()}
+
+        self.last_latency = {name: latency for name, (_, latency) in results.items()}
+        self.last_latency["total"] = (time.perf_counter() - start_time) * 1000
+        return np.mean([probabilities for probabilities, _ in results.values()], axis=0)
+
+    def predict(self, img, face_bbox):
+        # Prediction result
+        result = self.predict_batch([(img, face_bbox)])
+        return np.argmax(result[0]) == 1
+
+    def close(self):
+        self.executor.shutdown(wait=False)
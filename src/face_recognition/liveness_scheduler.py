@@ -0,0 +1,147 @@
+from collections import deque
+
+import cv2
+import numpy as np
+
+from config.settings import LivenessScheduleParam
+
+# Side of the grayscale face thumbnail used to detect appearance changes
+THUMBNAIL_SIZE = 16
+
+
+def bbox_iou(a, b):
+    # Intersection over union of two (x1, y1, x2, y2) boxes
+    inter_w = min(a[2], b[2]) - max(a[0], b[0])
+    inter_h = min(a[3], b[3]) - max(a[1], b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return float(inter / union) if union > 0 else 0.0
+
+
+def face_thumbnail(frame, bbox):
+    # Small grayscale copy of the face box, compared between frames
+    height, width = frame.shape[:2]
+    x1, y1 = max(0, int(bbox[0])), max(0, int(bbox[1]))
+    x2, y2 = min(width, int(bbox[2])), min(height, int(bbox[3]))
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        return None
+    gray = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+class LivenessTrack:
+    def __init__(self, bbox, window):
+        self.bbox = bbox
+        # Box and thumbnail at the last model run
+        self.inference_bbox = None
+        self.inference_thumbnail = None
+        self.frames_since_inference = 0
+        self.missed_frames = 0
+        self.probabilities = deque(maxlen=window)
+
+
+class LivenessScheduler:
+    """
+    Liveness decisions for the camera loops with fewer model runs
+    - Faces are followed across frames by box overlap; every track keeps the liveness
+      probabilities of its last `window` model runs
+    - The model only runs for a track every `inference_interval` frames, or earlier when the
+      box moved / resized or the face thumbnail changed beyond the configured thresholds
+    - The decision is the argmax of the averaged probabilities (label 1 = real face); a run
+      triggered by a change, or one that scores the face as fake, restarts the window so
+      earlier results never outvote it
+    """
+
+    def __init__(self, liveness_model, param=None):
+        self.liveness_model = liveness_model
+        self.param = param or LivenessScheduleParam()
+        self.reset()
+
+    def reset(self):
+        # Forget all tracks (call at the start of every camera session)
+        self.tracks = []
+        self.frames = 0
+        self.inferences = 0
+
+    def _match_track(self, bbox):
+        best_track, best_iou = None, self.param.track_iou_threshold
+        for track in self.tracks:
+            iou = bbox_iou(track.bbox, bbox)
+            if iou >= best_iou:
+                best_track, best_iou = track, iou
+        return best_track
+
+    def _inference_reason(self, track, bbox, thumbnail):
+        # Why the model has to run for this track now: None, "interval" or "changed"
+        param = self.param
+        if not track.probabilities or track.frames_since_inference >= param.inference_interval:
+            return "interval"
+        if bbox_iou(track.inference_bbox, bbox) < param.bbox_iou_threshold:
+            return "changed"
+        if thumbnail is None or track.inference_thumbnail is None:
+            return "changed"
+        if float(np.mean(np.abs(thumbnail - track.inference_thumbnail))) > param.appearance_threshold:
+            return "changed"
+        return None
+
+    def update(self, frame, bboxes):
+        # Liveness decisions for the face boxes of one frame: list of (is_real, real_probability, inferred)
+        if not self.param.enabled:
+            probabilities = self.liveness_model.predict_batch([(frame, bbox) for bbox in bboxes])
+            self.frames += 1
+            self.inferences += len(bboxes)
+            return [(bool(np.argmax(p) == 1), float(p[1]), True) for p in probabilities]
+
+        self.frames += 1
+        tracks, thumbnails, pending = [], [], []
+        for bbox in bboxes:
+            bbox = np.asarray(bbox, dtype=np.float32)
+            track = self._match_track(bbox)
+            if track is None or track in tracks:
+                track = LivenessTrack(bbox, self.param.window)
+                self.tracks.append(track)
+            thumbnail = face_thumbnail(frame, bbox)
+            # Counted before the check, so the model runs on every inference_interval-th frame
+            track.frames_since_inference += 1
+            reason = self._inference_reason(track, bbox, thumbnail)
+            if reason == "changed":
+                # Results of the face as it looked before must not outvote what is in view now
+                track.probabilities.clear()
+            if reason is not None:
+                pending.append(len(tracks))
+            track.bbox = bbox
+            track.missed_frames = 0
+            tracks.append(track)
+            thumbnails.append(thumbnail)
+
+        # All faces that need the model share one forward pass
+        if pending:
+            probabilities = self.liveness_model.predict_batch([(frame, bboxes[i]) for i in pending])
+            self.inferences += len(pending)
+            for i, probability in zip(pending, probabilities):
+                track = tracks[i]
+                if np.argmax(probability) != 1:
+                    # A fresh fake result is never averaged away by earlier real ones
+                    track.probabilities.clear()
+                track.probabilities.append(probability)
+                track.inference_bbox = track.bbox
+                track.inference_thumbnail = thumbnails[i]
+                track.frames_since_inference = 0
+
+        # Drop tracks that have not been seen for a while
+        for track in self.tracks:
+            if track not in tracks:
+                track.missed_frames += 1
+        self.tracks = [track for track in self.tracks if track.missed_frames <= self.param.max_missed_frames]
+
+        results = []
+        for i, track in enumerate(tracks):
+            mean = np.mean(track.probabilities, axis=0)
+            results.append((bool(np.argmax(mean) == 1), float(mean[1]), i in pending))
+        return results
+
+    def check(self, frame, bbox):
+        # Liveness decision for a single face: (is_real, real_probability, inferred)
+        return self.update(frame, [bbox])[0]
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+MiniFASNet liveness model export
+- fuse_bn folds every BatchNorm into the preceding convolution / the final classifier (eval only)
+- export_torchscript traces the fused model and saves a TorchScript artifact that
+  AntiSpoofPredict loads instead of the .pth when it is present and up to date
+Usage (from the project root):
+    python -m src.face_recognition.model_export                # export LIVENESS_MODEL_PATH
+    python -m src.face_recognition.model_export --runs 200     # more latency samples
+After exporting, the artifact is checked against the original .pth outputs and the CPU
+latency of the eager, fused and TorchScript models is reported.
+"""
+
+import argparse
+import copy
+import os
+import time
+
+import numpy as np
+import torch
+from torch.nn import BatchNorm1d, BatchNorm2d, Identity, Linear
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+from src.face_recognition.MiniFASNet import Conv_block, Linear_block, SEModule, MiniFASNet
+
+
+def torchscript_path(model_path):
+    # 2.7_80x80_MiniFASNetV2.pth -> 2.7_80x80_MiniFASNetV2.ts
+    return os.path.splitext(str(model_path))[0] + ".ts"
+
+
+def _fuse_linear_bn(linear, bn):
+    # bn(x) followed by linear(): fold the normalization into the linear weights and bias
+    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+    shift = bn.bias - bn.running_mean * scale
+    fused = Linear(linear.in_features, linear.out_features, bias=True)
+    fused.weight.data = linear.weight * scale
+    fused.bias.data = linear.weight @ shift + (linear.bias if linear.bias is not None else 0)
+    return fused
+
+
+def fuse_bn(model):
+    # Fold BatchNorm layers of a MiniFASNet (in eval mode) into the neighbouring layers, in place
+    model.eval()
+    with torch.no_grad():
+        for module in list(model.modules()):
+            if isinstance(module, (Conv_block, Linear_block)) and isinstance(module.bn, BatchNorm2d):
+                module.conv = fuse_conv_bn_eval(module.conv, module.bn)
+                module.bn = Identity()
+            elif isinstance(module, SEModule) and isinstance(module.bn1, BatchNorm2d):
+                module.fc1 = fuse_conv_bn_eval(module.fc1, module.bn1)
+                module.bn1 = Identity()
+                module.fc2 = fuse_conv_bn_eval(module.fc2, module.bn2)
+                module.bn2 = Identity()
+            elif isinstance(module, MiniFASNet) and isinstance(module.bn, BatchNorm1d):
+                # Dropout between bn and prob is the identity in eval mode
+                module.prob = _fuse_linear_bn(module.prob, module.bn)
+                module.bn = Identity()
+    return model
+
+
+def export_torchscript(model, path, height, width):
+    # Trace a (fused) model and save it as TorchScript
+    model.eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(model, torch.zeros(1, 3, height, width))
+        traced = torch.jit.freeze(traced)
+    traced.save(str(path))
+    return traced
+
+
+def latency_ms(model, inputs, runs):
+    # Mean single-image forward time after a short warm-up, shared with model_quantize
+    with torch.no_grad():
+        for _ in range(5):
+            model(inputs[:1])
+        start_time = time.perf_counter()
+        for i in range(runs):
+            model(inputs[i % len(inputs)].unsqueeze(0))
+    return (time.perf_counter() - start_time) * 1000 / runs
+
+
+def main():
+    from config.paths import LIVENESS_MODEL_PATH
+    from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=str(LIVENESS_MODEL_PATH), help=".pth model to export")
+    parser.add_argument("--output", default=None, help="TorchScript file (default: next to the .pth)")
+    parser.add_argument("--samples", type=int, default=64, help="random inputs used for the equivalence check")
+    parser.add_argument("--runs", type=int, default=100, help="timed single-image forward passes")
+    parser.add_argument("--tolerance", type=float, default=1e-4, help="max allowed softmax difference")
+    args = parser.parse_args()
+
+    # Original eager model straight from the .pth, without BN folding
+    predictor = AntiSpoofPredict(model_path=args.model, fuse=False, use_torchscript=False)
+    eager = predictor.model
+    height, width = predictor.input_size
+    fused = fuse_bn(copy.deepcopy(eager))
+
+    output = args.output or torchscript_path(args.model)
+    scripted = export_torchscript(fused, output, height, width)
+    print(f"Exported {output}")
+
+    # Equivalence check on inputs in the model's 0-255 range
+    torch.manual_seed(0)
+    inputs = torch.rand(args.samples, 3, height, width) * 255
+    with torch.no_grad():
+        reference = torch.softmax(eager(inputs), dim=1).numpy()
+        for name, model in (("fused", fused), ("torchscript", scripted)):
+            probs = torch.softmax(model(inputs), dim=1).numpy()
+            max_diff = float(np.abs(probs - reference).max())
+            agree = float(np.mean(probs.argmax(1) == reference.argmax(1)))
+            state = "OK" if max_diff <= args.tolerance else "MISMATCH"
+            print(f"{name:<12} max |dP| = {max_diff:.2e}, label agreement {agree:.1%} [{state}]")
+            if max_diff > args.tolerance:
+                raise SystemExit(f"{name} outputs differ from the .pth model")
+
+    print(f"CPU latency ({torch.get_num_threads()} threads, batch 1):")
+    for name, model in (("eager .pth", eager), ("fused", fused), ("torchscript", scripted)):
+        print(f"  {name:<12} {latency_ms(model, inputs, args.runs):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import threading
+import time
+import numpy as np
+
+from config.settings import ModelPoolParam, FaceModelParam
+from src.face_recognition.thread_budget import apply_onnxruntime_threads, apply_opencv_threads, apply_torch_threads
+
+
+def create_face_analysis(param=None, thread_param=None):
+    # FaceAnalysis with the configured model pack, restricted to the configured modules
+    # and limited to the configured thread budget
+    from insightface.app import FaceAnalysis
+    param = param or FaceModelParam()
+    apply_opencv_threads(thread_param)
+    app = FaceAnalysis(name=param.model_pack, allowed_modules=param.allowed_modules)
+    apply_onnxruntime_threads(app, thread_param)
+    app.prepare(ctx_id=param.ctx_id, det_size=tuple(param.det_size))
+    return app
+
+
+def warm_up_face_analysis(app):
+    # Detection on an empty frame, recognition on an aligned-size crop
+    app.get(np.zeros((480, 640, 3), dtype=np.uint8))
+    recognition = app.models.get('recognition')
+    if recognition is not None:
+        recognition.get_feat(np.zeros((112, 112, 3), dtype=np.uint8))
+
+
+def _create_liveness_model():
+    from config.settings import LivenessModelParam
+    apply_opencv_threads()
+    apply_torch_threads()
+    if LivenessModelParam.ensemble:
+        from src.face_recognition.liveness_ensemble import LivenessEnsemble
+        return LivenessEnsemble()
+    from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+    return AntiSpoofPredict()
+
+
+def _warm_up_liveness_model(model):
+    model.predict(np.zeros((480, 640, 3), dtype=np.uint8), np.array([200, 120, 240, 240]))
+
+
+def _create_face_database():
+    from src.face_recognition.face_database import FaceDatabase
+    return FaceDatabase()
+
+
+class ModelPool:
+    """
+    Process-wide registry of the heavy face models
+    - Each model is created on first use, warmed up once and then shared by
+      FaceDetector / FaceRecorder instances
+    - Models idle for longer than ModelPoolParam.idle_timeout are released
+    """
+
+    def __init__(self, param=None):
+        self.param = param or ModelPoolParam()
+        # name -> (factory, warm-up function or None)
+        self.factories = {
+            "face_analysis": (create_face_analysis, warm_up_face_analysis),
+            "liveness_model": (_create_liveness_model, _warm_up_liveness_model),
+            "face_database": (_create_face_database, None),
+        }
+        self.models = {}
+        self.last_used = {}
+        self._lock = threading.RLock()
+        self._evict_timer = None
+
+    def get(self, name):
+        # Return the shared model, loading and warming it up on first use
+        with self._lock:
+            model = self.models.get(name)
+            if model is None:
+                factory, warm_up = self.factories[name]
+                start_time = time.time()
+                model = factory()
+                if warm_up is not None and self.param.warm_up:
+                    warm_up(model)
+                self.models[name] = model
+                print(f"Model pool: loaded {name} in {time.time() - start_time:.2f}s")
+            self.last_used[name] = time.time()
+            self._schedule_eviction()
+            return model
+
+    def preload(self, names=None):
+        # Load (and warm up) the given models ahead of time
+        for name in names or self.factories:
+            self.get(name)
+
+    def release(self, name=None):
+        # Drop one model (or all of them); current users keep their reference
+        with self._lock:
+            for key in ([name] if name else list(self.models)):
+                self.models.pop(key, None)
+                self.last_used.pop(key, None)
+
+    def evict_idle(self):
+        # Release models that have been idle for longer than idle_timeout
+        with self._lock:
+            self._evict_timer = None
+            now = time.time()
+            for name, last_used in list(self.last_used.items()):
+                if now - last_used > self.param.idle_timeout:
+                    print(f"Model pool: releasing idle {name}")
+                    self.release(name)
+            self._schedule_eviction()
+
+    def _schedule_eviction(self):
+        if self.param.idle_timeout <= 0 or self._evict_timer is not None or not self.last_used:
+            return
+        delay = max(1.0, min(self.last_used.values()) + self.param.idle_timeout - time.time() + 1)
+        self._evict_timer = threading.Timer(delay, self.evict_idle)
+        self._evict_timer.daemon = True
+        self._evict_timer.start()
+
+
+_pool = ModelPool()
+
+
+def get_model_pool():
+    return _pool
+
+
+def get_face_analysis():
+    return _pool.get("face_analysis")
+
+
+def get_liveness_model():
+    return _pool.get("liveness_model")
+
+
+def get_face_database():
+    return _pool.get("face_database")
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+INT8 post-training static quantization of the MiniFASNet liveness model
+- Calibrates on a directory of face crops, framed like AntiSpoofPredict.img_preprocess
+  produces them; other sizes are resized. Subdirectories are included, the crops should
+  cover real faces and spoofs (photos, screens) under varied lighting
+- Only the pointwise convolutions of the body are quantized; the input stage, depthwise
+  convolutions, PReLU, residual adds and the classifier stay fp32
+- Reports agreement with the fp32 model on held-out crops and refuses to save the model
+  if it disagrees or its outputs barely vary across crops
+- Saves a TorchScript int8 model next to the .pth (<name>_int8.ts) that AntiSpoofPredict
+  loads when LivenessModelParam.quantized is set
+Usage (from the project root):
+    python -m src.face_recognition.model_quantize --crops data/liveness_crops
+    python -m src.face_recognition.model_quantize --crops calib/ --holdout-crops eval/
+"""
+
+import argparse
+import copy
+import operator
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.ao.quantization import QConfig, QConfigMapping, HistogramObserver, default_per_channel_weight_observer
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+from src.face_recognition.functional import to_tensor
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
+# Input stage and classifier of MiniFASNet, int8 activations there flip the predicted label
+FLOAT_MODULES = ("conv1", "conv2_dw", "conv_23", "conv_6_dw", "linear", "bn", "prob")
+
+
+def quantized_path(model_path):
+    # 2.7_80x80_MiniFASNetV2.pth -> 2.7_80x80_MiniFASNetV2_int8.ts
+    return os.path.splitext(str(model_path))[0] + "_int8.ts"
+
+
+def load_crops(directory, height, width):
+    # Face crops of a directory as a (N, 3, height, width) float tensor, same layout as img_preprocess
+    files = sorted(p for p in Path(directory).rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    crops = []
+    for path in files:
+        img = cv2.imread(str(path))
+        if img is None:
+            print(f"Skipping unreadable image: {path}")
+            continue
+        if img.shape[:2] != (height, width):
+            img = cv2.resize(img, (width, height))
+        crops.append(to_tensor(img))
+    if not crops:
+        raise SystemExit(f"No face crops found in {directory}")
+    return torch.stack(crops)
+
+
+class _FloatPReLU(torch.nn.Module):
+    # PReLU as a function call: FX lowering turns a PReLU module between int8 ops into a
+    # quantized PReLU even with qconfig None, and fails on the missing weight observer
+    def __init__(self, prelu):
+        super().__init__()
+        self.weight = prelu.weight
+
+    def forward(self, x):
+        return F.prelu(x, self.weight)
+
+
+def quantize_static(model, calibration, engine="x86", quantize_depthwise=False, batch_size=32):
+    # FX graph mode PTQ: fuse conv/bn, observe activations on calibration crops, convert to int8
+    torch.backends.quantized.engine = engine
+    model = copy.deepcopy(model).eval()
+    for name, module in list(model.named_modules()):
+        if isinstance(module, torch.nn.PReLU):
+            parent, _, attr = name.rpartition(".")
+            setattr(model.get_submodule(parent), attr, _FloatPReLU(module))
+
+    # Per-channel weights and histogram activation ranges; fbgemm/x86 need 7-bit activations
+    qconfig = QConfig(activation=HistogramObserver.with_args(reduce_range=engine != "qnnpack"),
+                      weight=default_per_channel_weight_observer)
+    # Residual adds and PReLU stay fp32: with int8 activations around them the outputs
+    # collapse to a constant after conv_6_sep
+    qconfig_mapping = QConfigMapping().set_global(qconfig) \
+        .set_object_type(operator.add, None) \
+        .set_object_type(torch.add, None) \
+        .set_object_type(F.prelu, None)
+    for name in FLOAT_MODULES:
+        qconfig_mapping.set_module_name(name, None)
+    if not quantize_depthwise:
+        # Quantized depthwise kernels dominate int8 latency on MiniFASNet's pruned channel
+        # counts, so those Conv_blocks stay in fp32 unless asked otherwise
+        for name, module in model.named_modules():
+            if isinstance(module, torch.nn.Conv2d) and module.groups > 1:
+                qconfig_mapping.set_module_name(name.rsplit(".", 1)[0], None)
+
+    prepared = prepare_fx(model, qconfig_mapping, example_inputs=(calibration[:1],))
+    with torch.no_grad():
+        for start in range(0, len(calibration), batch_size):
+            prepared(calibration[start:start + batch_size])
+    return convert_fx(prepared)
+
+
+def script_quantized(model, height, width):
+    # TorchScript keeps the quantized modules loadable without the FX graph code
+    with torch.no_grad():
+        return torch.jit.freeze(torch.jit.trace(model, torch.zeros(1, 3, height, width)))
+
+
+def compare(reference_model, quantized_model, inputs):
+    # Agreement of the int8 model with the fp32 model on held-out crops
+    with torch.no_grad():
+        reference = torch.softmax(reference_model(inputs), dim=1).numpy()
+        quantized = torch.softmax(quantized_model(inputs), dim=1).numpy()
+    return {
+        "samples": len(inputs),
+        "label_agreement": float(np.mean(reference.argmax(1) == quantized.argmax(1))),
+        # AntiSpoofPredict.predict only cares about "real" (label 1) vs everything else
+        "liveness_agreement": float(np.mean((reference.argmax(1) == 1) == (quantized.argmax(1) == 1))),
+        "max_prob_diff": float(np.abs(reference - quantized).max()),
+        "mean_prob_diff": float(np.abs(reference - quantized).mean()),
+        # A collapsed model gives the same probabilities for every crop
+        "reference_std": float(reference.std(0).max()),
+        "output_std": float(quantized.std(0).max()),
+    }
+
+
+def main():
+    from config.paths import LIVENESS_MODEL_PATH
+    from config.settings import LivenessModelParam
+    from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+    from src.face_recognition.model_export import fuse_bn, latency_ms
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=str(LIVENESS_MODEL_PATH), help="fp32 .pth model")
+    parser.add_argument("--crops", required=True, help="directory of face crops for calibration")
+    parser.add_argument("--holdout-crops", default=None,
+                        help="held-out crops for the agreement report (default: split off --crops)")
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="fraction of --crops held out when --holdout-crops is not given")
+    parser.add_argument("--engine", default=LivenessModelParam.quantized_engine, help="x86, fbgemm or qnnpack")
+    parser.add_argument("--quantize-depthwise", action="store_true", help="also quantize depthwise convolutions")
+    parser.add_argument("--output", default=None, help="int8 TorchScript file (default: next to the .pth)")
+    parser.add_argument("--min-agreement", type=float, default=0.95,
+                        help="minimum top-1 agreement with fp32 on the held-out crops")
+    parser.add_argument("--min-output-std", type=float, default=0.01,
+                        help="minimum std of the int8 probabilities across held-out crops")
+    parser.add_argument("--runs", type=int, default=100, help="timed single-image forward passes")
+    args = parser.parse_args()
+
+    predictor = AntiSpoofPredict(model_path=args.model, fuse=False, use_torchscript=False, quantized=False)
+    height, width = predictor.input_size
+    crops = load_crops(args.crops, height, width)
+    if args.holdout_crops:
+        calibration, holdout = crops, load_crops(args.holdout_crops, height, width)
+    else:
+        order = torch.randperm(len(crops), generator=torch.Generator().manual_seed(0))
+        n_holdout = max(1, int(len(crops) * args.holdout))
+        calibration, holdout = crops[order[n_holdout:]], crops[order[:n_holdout]]
+        if len(calibration) == 0:
+            raise SystemExit("Not enough crops to split off a held-out set")
+    print(f"Calibrating on {len(calibration)} crops, evaluating on {len(holdout)}")
+
+    fp32 = fuse_bn(copy.deepcopy(predictor.model))
+    with torch.no_grad():
+        labels = np.bincount(fp32(calibration).argmax(1).numpy(), minlength=predictor.num_classes)
+    print(f"fp32 labels of the calibration crops: {labels.tolist()}")
+    if np.count_nonzero(labels) < 2:
+        print("All calibration crops get the same label, add real and spoof crops")
+
+    quantized = quantize_static(predictor.model, calibration, args.engine, args.quantize_depthwise)
+    scripted = script_quantized(quantized, height, width)
+
+    report = compare(fp32, scripted, holdout)
+    print(f"Label agreement:    {report['label_agreement']:.1%}")
+    print(f"Liveness agreement: {report['liveness_agreement']:.1%}")
+    print(f"|dP| max / mean:    {report['max_prob_diff']:.4f} / {report['mean_prob_diff']:.4f}")
+    print(f"Output std:         {report['output_std']:.4f} (fp32 {report['reference_std']:.4f})")
+    if report["label_agreement"] < args.min_agreement or report["output_std"] < args.min_output_std:
+        raise SystemExit("Int8 model does not match the fp32 model on the held-out crops, not saved "
+                         "(use more varied crops or a different --engine)")
+    output = args.output or quantized_path(args.model)
+    scripted.save(str(output))
+    print(f"Saved {output}")
+
+    fp32_ms = latency_ms(fp32, holdout, args.runs)
+    int8_ms = latency_ms(scripted, holdout, args.runs)
+    print(f"CPU latency ({torch.get_num_threads()} threads, batch 1): "
+          f"fp32 {fp32_ms:.2f} ms, int8 {int8_ms:.2f} ms ({fp32_ms / int8_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
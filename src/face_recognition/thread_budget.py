@@ -0,0 +1,67 @@
+from config.settings import ThreadBudgetParam
+
+# Libraries already configured in this process
+_applied = set()
+
+
+def thread_split(param=None):
+    # {"onnxruntime": n, "torch": n, "opencv": n} for the configured budget, None when unlimited
+    # Detection/recognition and liveness run one after the other for a frame, so by default
+    # both get the whole budget; OpenCV only resizes small crops and stays single-threaded
+    param = param or ThreadBudgetParam()
+    if not param.total_threads:
+        return None
+    total = max(1, int(param.total_threads))
+    return {
+        "onnxruntime": param.onnxruntime_threads or total,
+        "torch": param.torch_threads or total,
+        "opencv": param.opencv_threads or 1,
+    }
+
+
+def apply_opencv_threads(param=None):
+    split = thread_split(param)
+    if split is None or "opencv" in _applied:
+        return
+    import cv2
+    cv2.setNumThreads(split["opencv"])
+    _applied.add("opencv")
+
+
+def apply_torch_threads(param=None):
+    split = thread_split(param)
+    if split is None or "torch" in _applied:
+        return
+    import torch
+    torch.set_num_threads(split["torch"])
+    try:
+        # Only allowed before torch has started any inter-op work
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    _applied.add("torch")
+
+
+def ort_session_options(threads):
+    import onnxruntime
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    # Idle worker threads sleep instead of spinning, so they do not steal cores from torch
+    options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    return options
+
+
+def apply_onnxruntime_threads(app, param=None):
+    # Recreate the sessions of a FaceAnalysis app with the thread budget
+    # (insightface does not pass session options through to onnxruntime)
+    split = thread_split(param)
+    if split is None:
+        return app
+    from insightface.model_zoo.model_zoo import PickableInferenceSession
+    options = ort_session_options(split["onnxruntime"])
+    for model in app.models.values():
+        model.session = PickableInferenceSession(model.model_file, sess_options=options,
+                                                 providers=model.session.get_providers())
+    return app
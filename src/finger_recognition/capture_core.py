@@ -16,9 +16,8 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 FP_TEMP_DIR = os.path.join(BASE_DIR, "fptemp")
-os.makedirs(FP_TEMP_DIR, exist_ok=True)
 
-# ========== DLL Loading ==========
+# ========== DLL Loading (on first capture, not at import time) ==========
 CANDIDATE_DLLS = ["libzkfp.dll", "zkfp.dll", "libzkfp_x64.dll", "zkfp_x64.dll"]
 
 def _load_dll():
@@ -30,28 +29,36 @@ def _load_dll():
             last_error = e
     raise OSError(f"Failed to load fingerprint DLL. Please confirm the DLL filename/path and bitness match. Last error: {last_error}")
 
-zk = _load_dll()
-
 # ========== C Types & Function Prototypes ==========
 HANDLE = C.c_void_p
 UINT   = C.c_uint
 INT    = C.c_int
 U8P    = C.POINTER(C.c_ubyte)
 
-zk.ZKFPM_Init.restype = INT
-zk.ZKFPM_Terminate.restype = INT
-zk.ZKFPM_GetDeviceCount.restype = INT
+_zk = None
+
+def _get_zk():
+    """Load the SDK DLL and declare the function prototypes on first use"""
+    global _zk
+    if _zk is None:
+        zk = _load_dll()
+
+        zk.ZKFPM_Init.restype = INT
+        zk.ZKFPM_Terminate.restype = INT
+        zk.ZKFPM_GetDeviceCount.restype = INT
 
-zk.ZKFPM_OpenDevice.argtypes = [INT]
-zk.ZKFPM_OpenDevice.restype  = HANDLE
-zk.ZKFPM_CloseDevice.argtypes = [HANDLE]
-zk.ZKFPM_CloseDevice.restype  = INT
+        zk.ZKFPM_OpenDevice.argtypes = [INT]
+        zk.ZKFPM_OpenDevice.restype  = HANDLE
+        zk.ZKFPM_CloseDevice.argtypes = [HANDLE]
+        zk.ZKFPM_CloseDevice.restype  = INT
 
-zk.ZKFPM_GetParameters.argtypes = [HANDLE, INT, U8P, C.POINTER(UINT)]
-zk.ZKFPM_GetParameters.restype  = INT
+        zk.ZKFPM_GetParameters.argtypes = [HANDLE, INT, U8P, C.POINTER(UINT)]
+        zk.ZKFPM_GetParameters.restype  = INT
 
-zk.ZKFPM_AcquireFingerprintImage.argtypes = [HANDLE, U8P, UINT]
-zk.ZKFPM_AcquireFingerprintImage.restype  = INT
+        zk.ZKFPM_AcquireFingerprintImage.argtypes = [HANDLE, U8P, UINT]
+        zk.ZKFPM_AcquireFingerprintImage.restype  = INT
+        _zk = zk
+    return _zk
 
 # ========== Parameter Codes ==========
 PARAM_IMG_W     = 1
@@ -63,7 +70,7 @@ def _get_param_int(hdev: HANDLE, code: int, nbytes: int = 4) -> int:
     """Get parameter (integer type)"""
     buf = (C.c_ubyte * nbytes)()
     size = UINT(nbytes)
-    ret = zk.ZKFPM_GetParameters(hdev, code, buf, C.byref(size))
+    ret = _get_zk().ZKFPM_GetParameters(hdev, code, buf, C.byref(size))
     if ret != 0:
         raise RuntimeError(f"GetParameters({code}) failed, ret={ret}")
     return int.from_bytes(bytes(buf[:size.value]), "little", signed=False)
@@ -102,6 +109,7 @@ def _save_gray8_to_bmp(raw_bytes: bytes, w: int, h: int, out_path: str) -> None:
 
 def _make_timestamp_bmp_path() -> str:
     """Generate timestamped BMP path (avoids duplication in the same minute)"""
+    os.makedirs(FP_TEMP_DIR, exist_ok=True)
     ts = time.strftime("%Y%m%d%H%M")
     base = os.path.join(FP_TEMP_DIR, ts)
     path = base + ".bmp"
@@ -117,6 +125,12 @@ def capture_fingerprint_bmp_iter(
     try_interval: float = 0.6,
     pre_settle_time: float = 1.2
 ) -> Generator[Tuple[str, Dict], None, Dict]:
+    try:
+        zk = _get_zk()
+    except OSError as e:
+        result = {"ok": False, "path": None, "reason": str(e)}
+        yield ("error", {"message": result["reason"]})
+        return result
     r = zk.ZKFPM_Init()
     if r not in (0, 1):
         result = {"ok": False, "path": None, "reason": f"ZKFPM_Init ret={r}"}
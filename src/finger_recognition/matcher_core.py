@@ -1,6 +1,9 @@
 # matcher_core.py
-import os, tempfile, shutil
-from typing import Tuple
+import os, tempfile, shutil, json, atexit, threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
 
 _USE_INTERNAL_IDENTIFY = False
 try:
@@ -9,6 +12,222 @@ try:
 except Exception:
     _USE_INTERNAL_IDENTIFY = False
 
+# With fingerprint_core installed, verification uses its identify_in_db_v2 (default).
+# True switches those installs to the in-memory SIFT template matcher instead; its
+# preprocessing only approximates fingerprint_core's, so enable it only after checking
+# accuracy parity on enrolled data. Installs without fingerprint_core always match in memory.
+USE_IN_MEMORY_MATCHING = False
+
+# Enrolled SIFT template stored next to the BMP: data/fingerprints/<user>.bmp -> <user>.sift.npz
+# Bump TEMPLATE_VERSION (or change TEMPLATE_PARAMS) whenever feature extraction changes;
+# templates written with other values are rebuilt from the BMP on next use
+TEMPLATE_VERSION = 1
+TEMPLATE_SUFFIX = ".sift.npz"
+TEMPLATE_PARAMS = {
+    "detector": "SIFT", "color": "grayscale", "nfeatures": 0,
+    # With fingerprint_core installed, approximate its identify normalisation
+    # (unify_to_280x360, use_clahe); only used when USE_IN_MEMORY_MATCHING is enabled
+    "unify_size": [280, 360] if _USE_INTERNAL_IDENTIFY else None,
+    "clahe": _USE_INTERNAL_IDENTIFY,
+}
+
+_sift = None
+
+
+def _get_sift():
+    global _sift
+    if _sift is None:
+        import cv2
+        _sift = cv2.SIFT_create(nfeatures=TEMPLATE_PARAMS["nfeatures"])
+    return _sift
+
+
+def template_path(enrolled_img_path) -> Path:
+    p = Path(enrolled_img_path)
+    return p.with_name(p.stem + TEMPLATE_SUFFIX)
+
+
+def preprocess(img):
+    """Normalisation applied before feature extraction (see TEMPLATE_PARAMS)"""
+    import cv2
+    if TEMPLATE_PARAMS["unify_size"]:
+        img = cv2.resize(img, tuple(TEMPLATE_PARAMS["unify_size"]))
+    if TEMPLATE_PARAMS["clahe"]:
+        img = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(img)
+    return img
+
+
+def extract_template(img) -> dict:
+    """
+    SIFT features of a grayscale fingerprint image (after preprocess)
+    keypoints: (N, 7) float32 [x, y, size, angle, response, octave, class_id]
+    descriptors: (N, 128) float32
+    """
+    kps, des = _get_sift().detectAndCompute(preprocess(img), None)
+    keypoints = np.array([[k.pt[0], k.pt[1], k.size, k.angle, k.response, k.octave, k.class_id] for k in kps],
+                         dtype=np.float32).reshape(-1, 7)
+    descriptors = (des if des is not None else np.empty((0, 128))).astype(np.float32)
+    meta = {"version": TEMPLATE_VERSION, "params": TEMPLATE_PARAMS,
+            "image_shape": list(img.shape[:2]), "count": int(len(keypoints))}
+    return {"keypoints": keypoints, "descriptors": descriptors, "meta": meta}
+
+
+def save_template(path, template: dict) -> None:
+    """Atomic write (tmp + replace) of an .npz template"""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, keypoints=template["keypoints"], descriptors=template["descriptors"],
+                 meta=np.array(json.dumps(template["meta"])))
+    os.replace(tmp, path)
+
+
+def load_template(path, enrolled_img_path=None) -> Optional[dict]:
+    """
+    Return the stored template, or None if it is missing, unreadable, from another
+    version / parameter set, or older than the enrolled image
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    if enrolled_img_path and os.path.exists(enrolled_img_path) \
+            and os.path.getmtime(enrolled_img_path) > os.path.getmtime(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            template = {"keypoints": data["keypoints"], "descriptors": data["descriptors"], "meta": meta}
+    except Exception:
+        return None
+    if meta.get("version") != TEMPLATE_VERSION or meta.get("params") != TEMPLATE_PARAMS:
+        return None
+    return template
+
+
+def build_template(enrolled_img_path) -> Optional[dict]:
+    """Extract the template of an enrolled BMP and store it next to it (None if unreadable)"""
+    import cv2
+    img = cv2.imread(str(enrolled_img_path), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None
+    template = extract_template(img)
+    save_template(template_path(enrolled_img_path), template)
+    return template
+
+
+def get_enrolled_template(enrolled_img_path) -> Optional[dict]:
+    """Stored template of an enrolled BMP, (re)built when missing or outdated"""
+    template = load_template(template_path(enrolled_img_path), enrolled_img_path)
+    if template is None:
+        template = build_template(enrolled_img_path)
+    return template
+
+
+def _as_template(fp, enrolled: bool = False) -> Optional[dict]:
+    """Template of a grayscale image, template or image path (enrolled paths use the stored template)"""
+    if isinstance(fp, dict):
+        return fp
+    if isinstance(fp, np.ndarray):
+        return extract_template(fp)
+    if enrolled:
+        return get_enrolled_template(fp)
+    import cv2
+    img = cv2.imread(str(fp), cv2.IMREAD_GRAYSCALE)
+    return extract_template(img) if img is not None else None
+
+
+def count_good_matches(live: dict, enrolled: dict, ratio: float = 0.8) -> int:
+    """Matches of two templates passing Lowe's ratio test"""
+    import cv2
+    des1, des2 = live["descriptors"], enrolled["descriptors"]
+    if len(des1) < 2 or len(des2) < 2:
+        return 0
+    flann = cv2.FlannBasedMatcher(dict(algorithm=1, trees=5), dict(checks=64))
+    knn = flann.knnMatch(des1, des2, k=2)
+    good = 0
+    for pair in knn:
+        if len(pair) < 2: continue
+        m, n = pair
+        if m.distance < ratio * n.distance:
+            good += 1
+    return good
+
+
+def match_fingerprint(live, enrolled, threshold: int = 15, ratio: float = 0.8) -> Tuple[bool, str]:
+    """
+    1:1 match in memory, no temporary files
+    live / enrolled: grayscale image (ndarray), template dict or image path
+    (an enrolled path uses its stored template)
+    Return (ok, message)
+    """
+    try:
+        live_t, enrolled_t = _as_template(live), _as_template(enrolled, enrolled=True)
+    except ImportError:
+        return False, "OpenCV not available"
+    if live_t is None or enrolled_t is None:
+        return False, "failed to read images"
+    if len(live_t["descriptors"]) < 2 or len(enrolled_t["descriptors"]) < 2:
+        return False, "insufficient features"
+    good = count_good_matches(live_t, enrolled_t, ratio)
+    ok = good >= threshold
+    return ok, (f"good={good} >= {threshold}" if ok else f"good={good} < {threshold}")
+
+
+def identify_fingerprint(live, gallery: dict, threshold: int = 15,
+                         ratio: float = 0.8) -> Tuple[Optional[str], str]:
+    """
+    1:N identify in memory: gallery maps name -> image / template / enrolled path
+    Return (best name or None, message)
+    """
+    live_t = _as_template(live)
+    if live_t is None:
+        return None, "failed to read live image"
+    best_name, best_good = None, -1
+    for name, enrolled in gallery.items():
+        enrolled_t = _as_template(enrolled, enrolled=True)
+        if enrolled_t is None:
+            continue
+        good = count_good_matches(live_t, enrolled_t, ratio)
+        if good > best_good:
+            best_name, best_good = name, good
+    if best_name is None or best_good < threshold:
+        return None, f"not found (best good={max(best_good, 0)} < {threshold})"
+    return best_name, f"{best_name}: good={best_good} >= {threshold}"
+
+
+def identify_in_db(live_img_path: str, db_dir: str, threshold: int = 15,
+                   ratio: float = 0.8) -> Tuple[bool, str]:
+    """
+    Compatibility shim for the directory-based identify: fingerprint_core's identify_in_db_v2
+    when installed, otherwise identify_fingerprint over the BMPs of db_dir
+    Return (ok, message)
+    """
+    if _USE_INTERNAL_IDENTIFY:
+        res = identify_in_db_v2(
+            live_img_path, db_dir,
+            ratio=ratio, not_found_threshold=threshold,
+            save_vis=False, unify_to_280x360=True, use_clahe=True
+        )
+        return (bool(res.ok), res.message or ("OK" if res.ok else "NOT OK"))
+    gallery = {p.stem: p for p in sorted(Path(db_dir).glob("*.bmp"))}
+    name, message = identify_fingerprint(live_img_path, gallery, threshold, ratio)
+    return name is not None, message
+
+
+# Reusable "mini database" directory for fingerprint_core's directory identify, one per
+# process in the system temp dir so nothing is left next to the enrolled prints
+_identify_dir = None
+_identify_lock = threading.Lock()
+
+
+def _get_identify_dir() -> str:
+    global _identify_dir
+    if _identify_dir is None or not os.path.isdir(_identify_dir):
+        _identify_dir = tempfile.mkdtemp(prefix="fpdb_", dir=tempfile.gettempdir())
+        atexit.register(shutil.rmtree, _identify_dir, True)
+    return _identify_dir
+
+
 def verify_fingerprint(live_img_path: str, enrolled_img_path: str,
                        threshold:int=15, ratio:float=0.8) -> Tuple[bool, str]:
     """
@@ -20,42 +239,32 @@ def verify_fingerprint(live_img_path: str, enrolled_img_path: str,
     if not os.path.exists(enrolled_img_path):
         return False, f"enrolled image not found: {enrolled_img_path}"
 
-    if _USE_INTERNAL_IDENTIFY:
-        # Treat the enrolled image as a "mini database"
-        tmpdir = tempfile.mkdtemp(prefix="fpdb_")
-        try:
-            dst = os.path.join(tmpdir, os.path.basename(enrolled_img_path))
-            shutil.copyfile(enrolled_img_path, dst)
-            res = identify_in_db_v2(
-                live_img_path, tmpdir,
-                ratio=ratio, not_found_threshold=threshold,
-                save_vis=False, unify_to_280x360=True, use_clahe=True
-            )
-            return (bool(res.ok), res.message or ("OK" if res.ok else "NOT OK"))
-        finally:
-            shutil.rmtree(tmpdir, ignore_errors=True)
+    if _USE_INTERNAL_IDENTIFY and not USE_IN_MEMORY_MATCHING:
+        # Treat the enrolled image as a "mini database": a hardlink (or copy) in the
+        # per-process directory, removed again once identify_in_db returns
+        with _identify_lock:
+            dbdir = _get_identify_dir()
+            dst = os.path.join(dbdir, os.path.basename(enrolled_img_path))
+            try:
+                try:
+                    os.link(enrolled_img_path, dst)
+                except OSError:
+                    # Different filesystem (or no hardlink support): fall back to a copy
+                    shutil.copyfile(enrolled_img_path, dst)
+                return identify_in_db(live_img_path, dbdir, threshold=threshold, ratio=ratio)
+            finally:
+                try:
+                    os.remove(dst)
+                except OSError:
+                    pass
     else:
-        # Fallback: Use simple SIFT matching (depends on opencv-contrib-python)
+        # SIFT matching in memory: the enrolled side comes from its stored template,
+        # only the live image is read and processed (depends on opencv-contrib-python)
         try:
-            import cv2, numpy as np
+            import cv2
         except Exception:
             return False, "No fingerprint_core and OpenCV not available"
         img1 = cv2.imread(live_img_path, cv2.IMREAD_GRAYSCALE)
-        img2 = cv2.imread(enrolled_img_path, cv2.IMREAD_GRAYSCALE)
-        if img1 is None or img2 is None:
+        if img1 is None:
             return False, "failed to read images"
-        sift = cv2.SIFT_create()
-        kp1, des1 = sift.detectAndCompute(img1, None)
-        kp2, des2 = sift.detectAndCompute(img2, None)
-        if des1 is None or des2 is None:
-            return False, "insufficient features"
-        flann = cv2.FlannBasedMatcher(dict(algorithm=1, trees=5), dict(checks=64))
-        knn = flann.knnMatch(des1, des2, k=2)
-        good = 0
-        for pair in knn:
-            if len(pair) < 2: continue
-            m, n = pair
-            if m.distance < ratio * n.distance:
-                good += 1
-        ok = good >= threshold
-        return ok, (f"good={good} >= {threshold}" if ok else f"good={good} < {threshold}")
\ No newline at end of file
+        return match_fingerprint(img1, enrolled_img_path, threshold=threshold, ratio=ratio)
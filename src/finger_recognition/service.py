@@ -53,6 +53,11 @@ class FingerprintService:
             except Exception:
                 pass
         shutil.move(str(tmp), str(dst))
+        # Precompute the matcher template so verification does not re-extract the enrolled image
+        try:
+            matcher_core.build_template(dst)
+        except Exception as e:
+            print(f"fingerprint template not built ({e}), it will be built on first verification")
         return dst
 
     # Login verification: Capture one live image + match with enrolled sample (parameters consistent with your previous settings)
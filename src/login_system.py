@@ -13,8 +13,9 @@ EE6008 Multimodal Login System - Single Window, View Switching (no top nav)
 
 import os
 import sys
-import json
+import glob
 import shutil
+import importlib
 import threading
 from pathlib import Path
 import tkinter as tk
@@ -31,9 +32,8 @@ for p in (str(BASE_DIR), str(PROJECT_ROOT)):
 from user_manage import UserManager
 from config.paths import FINGERPRINT_DIR
 try:
-    from config.paths import FACE_DATA_FILE, FACE_SAMPLE_DIR
+    from config.paths import FACE_SAMPLE_DIR
 except Exception:
-    FACE_DATA_FILE = PROJECT_ROOT / "data" / "face_data.json"
     FACE_SAMPLE_DIR = PROJECT_ROOT / "data" / "face_samples"
 
 # Fingerprint core
@@ -44,60 +44,71 @@ from finger_recognition import matcher_core
 from ui_theme import build_root
 
 # ---------------- Face modules ----------------
-FaceRecorderClass = None
-FaceDetectorClass = None
-FaceDBClass = None
-
-try:
-    from face_recognition.face_recorder import FaceRecorder as _FR
-    FaceRecorderClass = _FR
-except Exception:
-    try:
-        from face_recorder import FaceRecorder as _FR
-        FaceRecorderClass = _FR
-    except Exception:
-        FaceRecorderClass = None
-
-try:
-    from face_recognition.face_detector import FaceDetector as _FD
-    FaceDetectorClass = _FD
-except Exception:
+# Imported on first use (or by the background warm-up), so the window opens without
+# loading insightface / torch / onnxruntime / OpenCV
+_FACE_MODULE_CANDIDATES = {
+    "FaceRecorder": ("face_recognition.face_recorder", "face_recorder"),
+    "FaceDetector": ("face_recognition.face_detector", "face_detector"),
+    "FaceDatabase": ("face_recognition.face_database", "face_database"),
+}
+_face_classes = {}
+
+def _load_face_class(name: str):
+    if name not in _face_classes:
+        cls = None
+        for module_name in _FACE_MODULE_CANDIDATES[name]:
+            try:
+                cls = getattr(importlib.import_module(module_name), name)
+                break
+            except Exception:
+                continue
+        _face_classes[name] = cls
+    return _face_classes[name]
+
+def _warm_up_face_models():
+    # Import the face modules and load the shared models while the user types credentials
     try:
-        from face_detector import FaceDetector as _FD
-        FaceDetectorClass = _FD
-    except Exception:
-        FaceDetectorClass = None
+        for name in _FACE_MODULE_CANDIDATES:
+            _load_face_class(name)
+        from src.face_recognition.model_pool import get_model_pool
+        get_model_pool().preload()
+    except Exception as e:
+        print(f"Face model warm-up failed: {e}")
 
-try:
-    from face_recognition.face_database import FaceDatabase as _FDB
-    FaceDBClass = _FDB
-except Exception:
-    try:
-        from face_database import FaceDatabase as _FDB
-        FaceDBClass = _FDB
-    except Exception:
-        FaceDBClass = None
+def start_background_warm_up():
+    threading.Thread(target=_warm_up_face_models, daemon=True).start()
 
 
 # ---------------- Face wrappers ----------------
 def face_enroll(username: str):
+    FaceRecorderClass = _load_face_class("FaceRecorder")
     if FaceRecorderClass is None:
         raise ImportError("FaceRecorder not found.")
     return bool(FaceRecorderClass().run(username)), "FaceRecorder.run"
 
 def face_verify(username: str):
+    FaceDetectorClass = _load_face_class("FaceDetector")
     if FaceDetectorClass is None:
         raise ImportError("FaceDetector not found.")
     return bool(FaceDetectorClass().run(username)), "FaceDetector.run"
 
-# Delete face records (prioritize FaceDatabase, fallback to file operation if failed)
+# Delete face records through FaceDatabase (the only writer of the face store and log)
 _FACE_DELETE_CANDIDATES = ["delete_faces", "remove_user", "delete_user", "remove_faces"]
 
+def _get_face_db():
+    # Prefer the database shared with FaceRecorder/FaceDetector so they see the deletion
+    try:
+        from src.face_recognition.model_pool import get_face_database
+        return get_face_database()
+    except Exception:
+        FaceDBClass = _load_face_class("FaceDatabase")
+        return FaceDBClass() if FaceDBClass is not None else None
+
 def _delete_face_via_db(username: str) -> bool:
-    if FaceDBClass is None:
-        return False
     try:
-        db = FaceDBClass()
+        db = _get_face_db()
+        if db is None:
+            return False
         for name in _FACE_DELETE_CANDIDATES:
             fn = getattr(db, name, None)
             if callable(fn):
@@ -110,66 +121,25 @@ def _delete_face_via_db(username: str) -> bool:
     except Exception:
         return False
 
-def _delete_face_via_files(username: str) -> bool:
-    changed = False
-    # Delete sample directory
+def _delete_face_samples(username: str):
+    # Sample images saved at enrollment: <user>_<YYYYmmdd>_<HHMMSS>.jpg, or a per-user directory
     try:
         user_dir = FACE_SAMPLE_DIR / username
         if user_dir.exists():
             shutil.rmtree(user_dir, ignore_errors=True)
-            changed = True
-    except Exception:
-        pass
-    # Clean up face_data.json
-    try:
-        if FACE_DATA_FILE.exists():
-            with open(FACE_DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            def filter_list(lst):
-                nonlocal changed
-                kept = []
-                for item in lst:
-                    name = None
-                    if isinstance(item, dict):
-                        name = item.get("name") or item.get("username") or item.get("user")
-                    if isinstance(name, str) and name == username:
-                        changed = True
-                        for v in item.values():
-                            if isinstance(v, str) and v.lower().endswith((".jpg",".jpeg",".png",".bmp")):
-                                try:
-                                    Path(v).unlink(missing_ok=True)
-                                except Exception:
-                                    pass
-                    else:
-                        kept.append(item)
-                return kept
-
-            updated = False
-            if isinstance(data, list):
-                data = filter_list(data); updated = True
-            elif isinstance(data, dict):
-                if username in data:
-                    rec = data.pop(username); changed = True; updated = True
-                    if isinstance(rec, dict):
-                        for v in rec.values():
-                            if isinstance(v, str) and v.lower().endswith((".jpg",".jpeg",".png",".bmp")):
-                                try: Path(v).unlink(missing_ok=True)
-                                except Exception: pass
-                for k, v in list(data.items()):
-                    if isinstance(v, list):
-                        data[k] = filter_list(v); updated = True
-            if updated and changed:
-                with open(FACE_DATA_FILE, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+        for p in FACE_SAMPLE_DIR.glob(f"{glob.escape(username)}_????????_??????.jpg"):
+            p.unlink(missing_ok=True)
     except Exception:
         pass
-    return changed
 
 def delete_face_records(username: str) -> bool:
-    if _delete_face_via_db(username):
-        return True
-    return _delete_face_via_files(username)
+    # Face data lives in the FaceDatabase store and log; there is no file-level fallback,
+    # an edited face_data.json would be migrated back in on the next load
+    if not _delete_face_via_db(username):
+        print(f"Face database not available, face data of {username} was not deleted")
+        return False
+    _delete_face_samples(username)
+    return True
 
 
 # ---------------- Fingerprint service ----------------
@@ -194,6 +164,11 @@ class FingerprintService:
             if dst.exists(): dst.unlink()
         except Exception: pass
         tmp.replace(dst)
+        # Precompute the matcher template so verification does not re-extract the enrolled image
+        try:
+            matcher_core.build_template(dst)
+        except Exception as e:
+            print(f"fingerprint template not built ({e}), it will be built on first verification")
         return dst
 
     def verify(self, enrolled_path: Path, threshold=15, ratio=0.8):
@@ -493,6 +468,7 @@ class ManageView(ttk.Frame):
         if ok:
             try:
                 if fp_path and os.path.exists(fp_path): os.remove(fp_path)
+                if fp_path: matcher_core.template_path(fp_path).unlink(missing_ok=True)
             except Exception: pass
             msg = "User deleted."
             if face_deleted: msg += " (face data removed)"
@@ -574,4 +550,11 @@ if __name__ == "__main__":
         pass
 
     app = App()
+    # Load the face models in the background once the window is up
+    try:
+        from config.settings import ModelPoolParam
+        if ModelPoolParam.preload_on_startup:
+            app.root.after(200, start_background_warm_up)
+    except Exception:
+        pass
     app.root.mainloop()
\ No newline at end of file
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def make_db(tmp_path, monkeypatch):
+    # FaceDatabase factory with every data file inside tmp_path
+    import src.face_recognition.face_database as face_database
+    monkeypatch.setattr(face_database, "FACE_SAMPLE_DIR", tmp_path)
+    monkeypatch.setattr(face_database, "FACE_DATA_FILE", tmp_path / "face_data.json")
+    monkeypatch.setattr(face_database, "FACE_STORE_FILE", tmp_path / "face_data.bin")
+    monkeypatch.setattr(face_database, "FACE_INDEX_FILE", tmp_path / "face_index.npz")
+    monkeypatch.setattr(face_database, "FACE_LOG_FILE", tmp_path / "face_data.log")
+
+    def make_db(storage_dtype="float32"):
+        monkeypatch.setattr(face_database, "FACE_STORAGE_DTYPE", storage_dtype)
+        return face_database.FaceDatabase()
+    return make_db
+
+
+@pytest.fixture
+def embeddings():
+    # Factory for (count, 512) L2-normalized random float32 embeddings
+    def embeddings(count, seed=0):
+        rng = np.random.default_rng(seed)
+        matrix = rng.normal(size=(count, 512)).astype(np.float32)
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    return embeddings
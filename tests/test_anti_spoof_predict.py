@@ -0,0 +1,26 @@
+import os
+import shutil
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "model", "anti_spoof_model",
+                          "2.7_80x80_MiniFASNetV2.pth")
+
+
+def test_stale_int8_model_falls_back_to_fp32(tmp_path, capsys):
+    model_path = tmp_path / "2.7_80x80_MiniFASNetV2.pth"
+    shutil.copy(MODEL_PATH, model_path)
+    # Not a loadable TorchScript file, so loading it would raise
+    int8_path = tmp_path / "2.7_80x80_MiniFASNetV2_int8.ts"
+    int8_path.write_bytes(b"stale")
+    mtime = os.path.getmtime(model_path)
+    os.utime(int8_path, (mtime - 60, mtime - 60))
+
+    predictor = AntiSpoofPredict(model_path, use_torchscript=False, quantized=True)
+
+    assert not isinstance(predictor.model, torch.jit.ScriptModule)
+    assert "older than" in capsys.readouterr().out
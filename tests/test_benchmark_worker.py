@@ -0,0 +1,31 @@
+import textwrap
+
+from benchmarks._worker import PROJECT_ROOT, run_worker
+
+SCRIPT = textwrap.dedent(f"""
+    import sys
+    sys.path.insert(0, {str(PROJECT_ROOT)!r})
+    from benchmarks._worker import print_result
+    value = int(sys.argv[2])
+    if value < 0:
+        raise SystemExit("negative value")
+    print("log line")
+    print_result({{"value": value, "extra": sys.argv[3:]}})
+""")
+
+
+def test_worker_result_is_read_from_the_last_stdout_line(tmp_path):
+    script = tmp_path / "bench.py"
+    script.write_text(SCRIPT)
+
+    result, error = run_worker(script, [3], ["--frames", 5])
+
+    assert error is None
+    assert result == {"value": 3, "extra": ["--frames", "5"]}
+
+
+def test_worker_failure_reports_the_last_stderr_line(tmp_path):
+    script = tmp_path / "bench.py"
+    script.write_text(SCRIPT)
+
+    assert run_worker(script, [-1]) == (None, "negative value")
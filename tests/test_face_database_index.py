@@ -0,0 +1,60 @@
+import pytest
+
+from config.settings import FaceIndexParam
+import src.face_recognition.face_database as face_database
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    monkeypatch.setattr(FaceIndexParam, "enabled", True)
+    monkeypatch.setattr(FaceIndexParam, "exact_search_limit", 200)
+    monkeypatch.setattr(FaceIndexParam, "n_lists", 8)
+    monkeypatch.setattr(FaceIndexParam, "retrain_growth", 2)
+    calls = []
+    build_index = face_database.FaceDatabase.build_index
+
+    def counting_build_index(self):
+        calls.append(len(self.names))
+        build_index(self)
+    monkeypatch.setattr(face_database.FaceDatabase, "build_index", counting_build_index)
+    return calls
+
+
+def test_index_is_built_once_and_reused_across_restarts(make_db, builds, embeddings):
+    db = make_db()
+    gallery = embeddings(300)
+    db.set_embeddings([f"user{i}" for i in range(300)], gallery)
+    db.save_faces()
+
+    for _ in range(3):
+        db = make_db()
+        scores, names = db.search(gallery[7], k=1)
+        assert db.use_index()
+        assert names == ["user7"]
+
+    assert builds == [300]
+
+
+def test_search_never_trains_the_index(make_db, builds, embeddings):
+    db = make_db()
+    gallery = embeddings(300)
+    db.set_embeddings([f"user{i}" for i in range(300)], gallery)
+
+    db.search(gallery[0], k=1)
+
+    assert builds == []
+    assert not db.use_index()
+
+
+def test_index_is_retrained_at_enrollment_when_the_gallery_grows(make_db, builds, embeddings):
+    db = make_db()
+    db.set_embeddings([f"user{i}" for i in range(200)], embeddings(200))
+    db.save_faces()
+    db = make_db()
+    extra = embeddings(201, seed=1)
+    for i in range(201):
+        db.enroll_face(f"new{i}", extra[i])
+
+    assert builds == [200, 401]
+    assert make_db().index_trained_size == 401
+    assert builds == [200, 401]
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+def test_log_is_replayed_across_dtype_conversion(make_db, embeddings):
+    db = make_db("float32")
+    gallery = embeddings(100)
+    db.set_embeddings([f"user{i}" for i in range(100)], gallery)
+    db.save_faces()
+    db.enroll_face("x", embeddings(1, seed=1)[0])
+    db.delete_faces("user0")
+
+    db = make_db("float16")
+
+    assert len(db.face_data) == 100
+    assert "x" in db.face_data
+    assert "user0" not in db.face_data
+    assert db.embeddings.dtype == np.float16
+    # The conversion snapshot contains the replayed records, so the log is empty again
+    assert db.face_log.replay() == []
+    assert "x" in make_db("float16").face_data
+
+
+def test_torn_log_tail_is_dropped(make_db, embeddings):
+    db = make_db()
+    db.enroll_face("a", embeddings(1, seed=1)[0])
+    db.enroll_face("b", embeddings(1, seed=2)[0])
+    log_size = db.face_log.path.stat().st_size
+    with open(db.face_log.path, "ab") as f:
+        # Half-written record from a crash during append
+        f.write(b"\x01\x00\x00\x00\xff\xff")
+
+    db = make_db()
+
+    assert set(db.face_data) == {"a", "b"}
+    assert db.face_log.path.stat().st_size == log_size
+    db.enroll_face("c", embeddings(1, seed=3)[0])
+    assert set(make_db().face_data) == {"a", "b", "c"}
+
+
+def test_replay_after_compaction_is_idempotent(make_db, monkeypatch, embeddings):
+    db = make_db()
+    for i in range(5):
+        db.enroll_face(f"user{i}", embeddings(1, seed=i)[0])
+    db.delete_faces("user1")
+    db.enroll_face("user2", embeddings(1, seed=10)[0])
+    expected = {name: db.face_data[name].copy() for name in db.face_data}
+
+    # Crash between writing the snapshot and emptying the log
+    monkeypatch.setattr(db.face_log, "reset", lambda: None)
+    db.save_faces()
+    assert db.face_log.replay()
+
+    db = make_db()
+
+    assert set(db.face_data) == set(expected)
+    for name, embedding in expected.items():
+        np.testing.assert_allclose(db.face_data[name], embedding, rtol=1e-5, atol=1e-7)
+
+
+def test_missing_data_dir_is_created(tmp_path, monkeypatch, make_db, embeddings):
+    import src.face_recognition.face_database as face_database
+    data_dir = tmp_path / "data"
+    monkeypatch.setattr(face_database, "FACE_STORE_FILE", data_dir / "face_data.bin")
+    monkeypatch.setattr(face_database, "FACE_INDEX_FILE", data_dir / "face_data.npz")
+    monkeypatch.setattr(face_database, "FACE_LOG_FILE", data_dir / "face_data.log")
+
+    db = make_db()
+    db.enroll_face("x", embeddings(1)[0])
+    db.save_faces()
+
+    assert (data_dir / "face_data.bin").exists()
+    assert "x" in make_db().face_data
+
+
+def test_no_mapping_is_open_when_the_store_is_replaced(make_db, monkeypatch, embeddings):
+    # Windows refuses to replace a file that is still mapped; track every mapping instead
+    import mmap
+    import weakref
+    import src.face_recognition.face_database as face_database
+
+    mappings = []
+    real_mmap = mmap.mmap
+
+    def tracked_mmap(*args, **kwargs):
+        mapping = real_mmap(*args, **kwargs)
+        mappings.append(weakref.ref(mapping))
+        return mapping
+
+    def checked_write(*args, **kwargs):
+        assert all(ref() is None or ref().closed for ref in mappings)
+        return real_write(*args, **kwargs)
+
+    real_write = face_database.write_face_store
+    monkeypatch.setattr(mmap, "mmap", tracked_mmap)
+    monkeypatch.setattr(face_database, "write_face_store", checked_write)
+
+    db = make_db("float32")
+    db.set_embeddings([f"user{i}" for i in range(10)], embeddings(10))
+    db.save_faces()
+
+    db = make_db("float16")
+    assert mappings
+    db.enroll_face("x", embeddings(1, seed=1)[0])
+    db.save_faces()
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from config.settings import CaptureParam, DisplayParam
+import src.face_recognition.face_detector as face_detector
+
+
+class FakePipeline:
+    # One steady face on every frame
+    def reset(self):
+        pass
+
+    def get(self, frame):
+        return [SimpleNamespace(bbox=np.array([200, 120, 360, 320], dtype=np.float32),
+                                normed_embedding=np.ones(512, dtype=np.float32) / np.sqrt(512))]
+
+
+class RealFaceModel:
+    num_classes = 3
+
+    def predict_batch(self, frames_and_bboxes):
+        return np.tile([[0.05, 0.9, 0.05]], (len(list(frames_and_bboxes)), 1)).astype(np.float32)
+
+
+class NoMatchDatabase:
+    def verify_face(self, embedding, username, threshold, cohort=None):
+        return 0, "Unknown"
+
+    def compare_faces(self, embedding, threshold):
+        return 0, "Unknown"
+
+
+@pytest.fixture
+def frames_dir(tmp_path):
+    for i in range(8):
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), np.zeros((480, 640, 3), dtype=np.uint8))
+    return tmp_path
+
+
+@pytest.fixture
+def detector_class(monkeypatch):
+    monkeypatch.setattr(face_detector, "get_face_analysis", lambda: None)
+    monkeypatch.setattr(face_detector, "get_liveness_model", RealFaceModel)
+    monkeypatch.setattr(face_detector, "get_face_database", NoMatchDatabase)
+    monkeypatch.setattr(face_detector, "FacePipeline", lambda app: FakePipeline())
+    monkeypatch.setattr(DisplayParam, "headless", True)
+    monkeypatch.setattr(CaptureParam, "replay_realtime", False)
+    return face_detector.FaceDetector
+
+
+def test_face_verify_headless_rejects_failed_match(detector_class, frames_dir, monkeypatch):
+    login_system = pytest.importorskip("src.login_system")
+    monkeypatch.setattr(CaptureParam, "source", str(frames_dir))
+    monkeypatch.setitem(login_system._face_classes, "FaceDetector", detector_class)
+
+    ok, _ = login_system.face_verify("alice")
+
+    assert ok is False
+
+
+def test_headless_run_returns_bool_and_keeps_result(detector_class, frames_dir):
+    detector = detector_class()
+
+    result = detector.run("alice", source=str(frames_dir), headless=True)
+
+    assert result is False
+    assert detector.last_result["ok"] is False
+    assert detector.last_result["status"] == "no_frame"
+    assert len(detector.last_result["frames"]) == 8
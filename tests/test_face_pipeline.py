@@ -0,0 +1,45 @@
+import sys
+import types
+
+import numpy as np
+
+from config.settings import FacePipelineParam, FaceTrackingParam
+from src.face_recognition.face_pipeline import FacePipeline
+
+
+class Face(dict):
+    # Minimal stand-in for insightface.app.common.Face
+    __getattr__ = dict.get
+
+
+class FakeDetector:
+    input_size = (640, 640)
+
+    def __init__(self):
+        self.calls = []
+
+    def detect(self, img, input_size=None, max_num=0, metric='default'):
+        # One face in the middle of whatever region it is given
+        self.calls.append("full" if img.shape[:2] == (480, 640) else "roi")
+        height, width = img.shape[:2]
+        box = [width * 0.35, height * 0.3, width * 0.65, height * 0.7, 0.9]
+        return np.array([box], dtype=np.float32), None
+
+
+def test_full_detection_runs_on_every_nth_frame(monkeypatch):
+    common = types.ModuleType("insightface.app.common")
+    common.Face = Face
+    monkeypatch.setitem(sys.modules, "insightface.app.common", common)
+    tracking = FaceTrackingParam()
+    tracking.enabled = True
+    tracking.full_detect_interval = 3
+    param = FacePipelineParam()
+    param.adaptive_det_size = False
+    detector = FakeDetector()
+    pipeline = FacePipeline(types.SimpleNamespace(det_model=detector, models={}), tracking, param)
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    for _ in range(9):
+        assert pipeline.get(frame)
+
+    assert detector.calls == ["full", "roi", "roi"] * 3
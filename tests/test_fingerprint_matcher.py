@@ -0,0 +1,74 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+import src.finger_recognition.matcher_core as matcher_core
+
+
+@pytest.fixture
+def prints(tmp_path):
+    rng = np.random.default_rng(0)
+    enrolled = cv2.GaussianBlur(rng.integers(0, 256, (360, 280), dtype=np.uint8), (5, 5), 1.5)
+    live = np.clip(enrolled.astype(int) + rng.integers(-10, 10, enrolled.shape), 0, 255).astype(np.uint8)
+    cv2.imwrite(str(tmp_path / "alice.bmp"), enrolled)
+    cv2.imwrite(str(tmp_path / "live.bmp"), live)
+    return tmp_path / "live.bmp", tmp_path / "alice.bmp"
+
+
+@pytest.fixture
+def fingerprint_core(monkeypatch):
+    # Record what identify_in_db_v2 sees in its database directory
+    calls = []
+
+    def identify_in_db_v2(live_img_path, db_dir, **kwargs):
+        files = sorted(os.listdir(db_dir))
+        calls.append((db_dir, files, [os.stat(os.path.join(db_dir, f)).st_ino for f in files]))
+        return SimpleNamespace(ok=True, message="OK")
+    monkeypatch.setattr(matcher_core, "_USE_INTERNAL_IDENTIFY", True)
+    monkeypatch.setattr(matcher_core, "identify_in_db_v2", identify_in_db_v2, raising=False)
+    monkeypatch.setattr(matcher_core, "_identify_dir", None)
+    return calls
+
+
+def test_fingerprint_core_is_used_by_default(prints, fingerprint_core):
+    live, enrolled = prints
+
+    assert matcher_core.verify_fingerprint(str(live), str(enrolled)) == (True, "OK")
+    assert len(fingerprint_core) == 1
+
+
+def test_identify_directory_is_reused_and_holds_only_the_enrolled_print(prints, fingerprint_core):
+    live, enrolled = prints
+
+    matcher_core.verify_fingerprint(str(live), str(enrolled))
+    matcher_core.verify_fingerprint(str(live), str(enrolled))
+
+    (dir1, files1, _), (dir2, files2, _) = fingerprint_core
+    assert dir1 == dir2
+    assert files1 == files2 == ["alice.bmp"]
+    assert os.listdir(dir1) == []
+
+
+def test_identify_directory_is_outside_the_enrolled_folder(prints, fingerprint_core):
+    live, enrolled = prints
+    before = sorted(os.listdir(enrolled.parent))
+
+    matcher_core.verify_fingerprint(str(live), str(enrolled))
+
+    db_dir = fingerprint_core[0][0]
+    assert os.path.dirname(db_dir) == tempfile.gettempdir()
+    assert sorted(os.listdir(enrolled.parent)) == before
+
+
+def test_in_memory_matching_is_opt_in(prints, fingerprint_core, monkeypatch):
+    live, enrolled = prints
+    monkeypatch.setattr(matcher_core, "USE_IN_MEMORY_MATCHING", True)
+
+    ok, message = matcher_core.verify_fingerprint(str(live), str(enrolled))
+
+    assert ok and message.startswith("good=")
+    assert fingerprint_core == []
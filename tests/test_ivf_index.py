@@ -0,0 +1,28 @@
+import tracemalloc
+
+import numpy as np
+
+from src.face_recognition.ivf_index import IVFIndex
+
+
+def unit_rows(count, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = rng.normal(size=(count, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def test_training_scores_in_row_blocks():
+    matrix = unit_rows(20000, 64)
+    decode = matrix.__getitem__
+    index = IVFIndex(400, train_iterations=2, block_rows=1024)
+
+    tracemalloc.start()
+    index.train(decode, len(matrix))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # A full 20000 x 400 float32 score matrix alone would take 32 MB
+    assert peak < 16 * 1024 * 1024
+    reference = IVFIndex(400, train_iterations=2, block_rows=len(matrix))
+    reference.train(decode, len(matrix))
+    np.testing.assert_array_equal(index.assign, reference.assign)
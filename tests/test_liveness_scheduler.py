@@ -0,0 +1,75 @@
+import numpy as np
+
+from config.settings import LivenessScheduleParam
+from src.face_recognition.liveness_scheduler import LivenessScheduler
+
+REAL = [0.05, 0.9, 0.05]
+FAKE = [0.9, 0.05, 0.05]
+BOX = [200, 120, 360, 320]
+
+
+class ScriptedModel:
+    # Scores a frame as real unless its face region is bright (the "photo")
+    num_classes = 3
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_batch(self, frames_and_bboxes):
+        self.calls += 1
+        return np.array([FAKE if frame[BOX[1]:BOX[3], BOX[0]:BOX[2]].mean() > 127 else REAL
+                         for frame, _ in frames_and_bboxes], dtype=np.float32)
+
+
+def make_frame(value, rng):
+    frame = np.full((480, 640, 3), value, dtype=np.uint8)
+    noise = rng.integers(-2, 3, frame.shape)
+    return np.clip(frame.astype(int) + noise, 0, 255).astype(np.uint8)
+
+
+def test_steady_face_reuses_results():
+    rng = np.random.default_rng(0)
+    model = ScriptedModel()
+    scheduler = LivenessScheduler(model, LivenessScheduleParam())
+
+    results = [scheduler.check(make_frame(60, rng), BOX) for _ in range(20)]
+
+    assert all(is_real for is_real, _, _ in results)
+    assert model.calls == 4
+
+
+def test_photo_swapped_in_at_same_box_is_rejected():
+    rng = np.random.default_rng(0)
+    scheduler = LivenessScheduler(ScriptedModel(), LivenessScheduleParam())
+    for _ in range(10):
+        assert scheduler.check(make_frame(60, rng), BOX)[0]
+
+    photo = [scheduler.check(make_frame(200, rng), BOX) for _ in range(12)]
+
+    assert not any(is_real for is_real, _, _ in photo)
+
+
+def test_fake_result_from_interval_run_is_not_outvoted():
+    param = LivenessScheduleParam()
+    param.appearance_threshold = 1e9
+    param.bbox_iou_threshold = 0.0
+    rng = np.random.default_rng(0)
+    scheduler = LivenessScheduler(ScriptedModel(), param)
+    for _ in range(10):
+        scheduler.check(make_frame(60, rng), BOX)
+
+    # Change detection disabled: the next periodic run sees the photo and must decide alone
+    photo = [scheduler.check(make_frame(200, rng), BOX)[0] for _ in range(param.inference_interval + 1)]
+
+    assert photo[-1] is False
+
+
+def test_interval_runs_on_every_nth_frame():
+    param = LivenessScheduleParam()
+    param.inference_interval = 5
+    rng = np.random.default_rng(0)
+    scheduler = LivenessScheduler(ScriptedModel(), param)
+
+    inferred = [scheduler.check(make_frame(60, rng), BOX)[2] for _ in range(16)]
+
+    assert inferred == [True, False, False, False, False] * 3 + [True]
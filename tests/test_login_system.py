@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tkinter")
+import src.login_system as login_system
+
+
+def test_deleted_face_stays_deleted_after_reload(make_db, tmp_path, monkeypatch):
+    db = make_db()
+    db.enroll_face("alice", np.ones(512, dtype=np.float32))
+    db.enroll_face("bob", np.ones(512, dtype=np.float32))
+    (tmp_path / "alice_20240101_120000.jpg").write_bytes(b"")
+    (tmp_path / "alice2_20240101_120000.jpg").write_bytes(b"")
+    monkeypatch.setattr(login_system, "_get_face_db", lambda: db)
+    monkeypatch.setattr(login_system, "FACE_SAMPLE_DIR", tmp_path)
+
+    assert login_system.delete_face_records("alice")
+
+    reloaded = make_db()
+    assert "alice" not in reloaded.face_data
+    assert "bob" in reloaded.face_data
+    assert not (tmp_path / "alice_20240101_120000.jpg").exists()
+    assert (tmp_path / "alice2_20240101_120000.jpg").exists()
+
+
+def test_nothing_is_reported_deleted_without_the_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(login_system, "_get_face_db", lambda: None)
+    monkeypatch.setattr(login_system, "FACE_SAMPLE_DIR", tmp_path)
+
+    assert not login_system.delete_face_records("alice")
@@ -0,0 +1,68 @@
+import copy
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+from src.face_recognition.model_export import export_torchscript, fuse_bn, torchscript_path
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "model", "anti_spoof_model",
+                          "2.7_80x80_MiniFASNetV2.pth")
+
+
+@pytest.fixture
+def exported(tmp_path):
+    # Copy of the shipped .pth with its fused TorchScript export next to it
+    model_path = tmp_path / os.path.basename(MODEL_PATH)
+    shutil.copy(MODEL_PATH, model_path)
+    predictor = AntiSpoofPredict(model_path, fuse=True, use_torchscript=False)
+    height, width = predictor.input_size
+    script_path = torchscript_path(model_path)
+    export_torchscript(predictor.model, script_path, height, width)
+    return model_path, script_path
+
+
+def face_frames(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(rng.integers(0, 256, (240, 320, 3), dtype=np.uint8), [100, 60, 180, 160]) for _ in range(count)]
+
+
+def test_fused_model_matches_the_shipped_pth():
+    predictor = AntiSpoofPredict(fuse=False, use_torchscript=False)
+    eager = predictor.model
+    fused = fuse_bn(copy.deepcopy(eager))
+    height, width = predictor.input_size
+
+    torch.manual_seed(0)
+    inputs = torch.rand(16, 3, height, width) * 255
+    with torch.no_grad():
+        reference = torch.softmax(eager(inputs), dim=1).numpy()
+        probs = torch.softmax(fused(inputs), dim=1).numpy()
+
+    assert not any(isinstance(m, torch.nn.BatchNorm2d) for m in fused.modules())
+    assert np.abs(probs - reference).max() < 1e-4
+
+
+def test_torchscript_export_is_loaded_and_matches_the_pth(exported):
+    model_path, _ = exported
+    frames = face_frames(4)
+
+    scripted = AntiSpoofPredict(model_path, use_torchscript=True, quantized=False)
+    eager = AntiSpoofPredict(model_path, fuse=False, use_torchscript=False, quantized=False)
+
+    assert isinstance(scripted.model, torch.jit.ScriptModule)
+    assert np.abs(scripted.predict_batch(frames) - eager.predict_batch(frames)).max() < 1e-4
+
+
+def test_torchscript_export_older_than_the_pth_is_skipped(exported):
+    model_path, script_path = exported
+    mtime = os.path.getmtime(model_path)
+    os.utime(script_path, (mtime - 60, mtime - 60))
+
+    predictor = AntiSpoofPredict(model_path, use_torchscript=True, quantized=False)
+
+    assert not isinstance(predictor.model, torch.jit.ScriptModule)
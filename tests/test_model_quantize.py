@@ -0,0 +1,71 @@
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.face_recognition.anti_spoof_predict import AntiSpoofPredict
+from src.face_recognition.functional import to_tensor
+from src.face_recognition.model_quantize import compare, main, quantize_static, script_quantized
+
+
+def varied_crops(count, height=80, width=80, seed=0):
+    # Face-like blobs on smooth backgrounds, with screen moire, blur or noise on some of them
+    rng = np.random.default_rng(seed)
+    crops = []
+    for i in range(count):
+        size = int(rng.integers(2, 12))
+        img = cv2.resize(rng.uniform(0, 255, (size, size, 3)).astype(np.float32), (width, height),
+                         interpolation=cv2.INTER_CUBIC)
+        axes = (int(width * rng.uniform(0.2, 0.4)), int(height * rng.uniform(0.3, 0.45)))
+        cv2.ellipse(img, (width // 2, height // 2), axes, 0, 0, 360, rng.uniform(60, 230, 3).tolist(), -1)
+        for x in (width // 2 - 10, width // 2 + 10):
+            cv2.circle(img, (x, height // 2 - 8), 3, rng.uniform(0, 80, 3).tolist(), -1)
+        if i % 4 == 1:
+            yy, xx = np.mgrid[0:height, 0:width]
+            img += 40 * np.sin(xx * rng.uniform(1, 3) + yy * rng.uniform(0.5, 2))[..., None]
+        elif i % 4 == 2:
+            img = cv2.GaussianBlur(img, (7, 7), rng.uniform(1, 3))
+        elif i % 4 == 3:
+            img += rng.normal(0, 20, img.shape)
+        img = img * rng.uniform(0.5, 1.3) + rng.uniform(-40, 40)
+        crops.append(np.clip(img, 0, 255).astype(np.uint8))
+    return crops
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    return AntiSpoofPredict(fuse=False, use_torchscript=False, quantized=False)
+
+
+def test_int8_model_follows_fp32_on_varied_crops(predictor):
+    height, width = predictor.input_size
+    crops = torch.stack([to_tensor(img) for img in varied_crops(240, height, width)])
+    calibration, holdout = crops[:160], crops[160:]
+
+    quantized = quantize_static(predictor.model, calibration, engine="x86")
+    report = compare(predictor.model, script_quantized(quantized, height, width), holdout)
+
+    assert report["reference_std"] > 0.1
+    assert report["output_std"] > 0.5 * report["reference_std"]
+    assert report["label_agreement"] >= 0.9
+
+
+def test_collapsed_int8_model_is_not_saved(tmp_path, monkeypatch):
+    crops_dir = tmp_path / "crops"
+    crops_dir.mkdir()
+    # Identical crops give identical outputs, which the variance check rejects
+    img = varied_crops(1)[0]
+    for i in range(10):
+        cv2.imwrite(str(crops_dir / f"{i}.png"), img)
+    output = tmp_path / "model_int8.ts"
+    monkeypatch.setattr(sys, "argv", ["model_quantize", "--crops", str(crops_dir),
+                                      "--output", str(output), "--runs", "1"])
+
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code not in (None, 0)
+    assert not output.exists()